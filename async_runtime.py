@@ -0,0 +1,186 @@
+import asyncio
+import contextvars
+import functools
+import os
+
+from dialog_machine import extract_turn, extract_plain_turn
+from tracing import tracer
+
+
+class AsyncSettings(object):
+    def __init__(self, settings):
+        """
+        Asynchronous version of the Settings I/O. Blocking calls (synthesis, listening, recognition, parsing) run
+        in the executor, playback runs in the streaming player of the settings which can be stopped at any time.
+        Without a streaming player the sentences are played by playsound and cannot be stopped.
+        :param settings: Settings object
+        """
+        self.settings = settings
+        self.prefetched = {}
+        self.playback = None
+
+    @staticmethod
+    async def run_blocking(function, *args):
+        # executor threads run in the context of the caller, so spans keep the trace id of the session
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(context.run, function, *args))
+
+    def prefetch(self, response: str):
+        """
+        Starts the synthesis of the sentence which will be spoken later
+        :param response: sentence that will be spoken
+        :return:
+        """
+        if response not in self.prefetched:
+            if self.settings.player is not None:
+                synthesize = self.settings.synthesize_audio
+            else:
+                synthesize = self.settings.synthesize
+            self.prefetched[response] = asyncio.ensure_future(self.run_blocking(synthesize, response))
+
+    async def discard_prefetched(self):
+        """
+        Drops the sentences which were prefetched but not spoken (e.g., the answer of the other age case)
+        :return:
+        """
+        prefetched, self.prefetched = self.prefetched, {}
+        for task in prefetched.values():
+            try:
+                result = await task
+            except Exception:
+                continue
+            if isinstance(result, tuple) and result[1]:
+                os.remove(result[0])
+
+    async def take_prefetched(self, response: str) -> object:
+        """
+        :param response: sentence that will be spoken
+        :return: result of the prefetched synthesis, None if the sentence was not prefetched or its synthesis failed
+        """
+        prefetched = self.prefetched.pop(response, None)
+        if prefetched is None:
+            return None
+        try:
+            return await prefetched
+        except Exception as e:
+            print("Prefetched synthesis failed, the sentence is synthesized again; {0}".format(e))
+            return None
+
+    async def synthesize(self, response: str) -> tuple:
+        result = await self.take_prefetched(response)
+        if result is None:
+            result = await self.run_blocking(self.settings.synthesize, response)
+        return result
+
+    @staticmethod
+    def check_playback(playback):
+        """
+        Reports the error of the finished playback. The sentence is lost but the dialog goes on.
+        :param playback: finished playback task
+        :return:
+        """
+        if playback.cancelled():
+            return
+        try:
+            playback.result()
+        except Exception as e:
+            print("Speech could not be played; {0}".format(e))
+
+    async def play(self, path: str):
+        from playsound import playsound
+        with self.settings.calibrator.paused():
+            await self.run_blocking(playsound, path)
+
+    async def speech_generator(self, response: str):
+        """
+        Speaks the sentence. Playback can be stopped by stop_playback, then the method returns immediately.
+        :param response: sentence that will be spoken
+        :return:
+        """
+        if self.settings.player is not None:
+            await self.stream_speech(response)
+            return
+        path, temporary = await self.synthesize(response)
+        playback = asyncio.ensure_future(self.play(path))
+        self.playback = playback
+        try:
+            await asyncio.wait([playback])
+        finally:
+            if not playback.done():
+                playback.cancel()
+            self.playback = None
+            if temporary:
+                os.remove(path)
+        self.check_playback(playback)
+
+    async def stream_speech(self, response: str):
+        """
+        Plays the sentence from memory through the streaming player of the settings. If the sentence was prefetched
+        its audio is played, otherwise (also if its synthesis failed) playback starts with the first synthesized
+        chunk.
+        :param response: sentence that will be spoken
+        :return:
+        """
+        audio = await self.take_prefetched(response)
+        playback = asyncio.ensure_future(self.run_blocking(self.settings.stream_speech, response, audio))
+        self.playback = playback
+        try:
+            await asyncio.wait([playback])
+        finally:
+            if not playback.done():
+                self.settings.player.stop()
+            self.playback = None
+        self.check_playback(playback)
+
+    def stop_playback(self):
+        if self.settings.player is not None:
+            self.settings.player.stop()
+        if self.playback is not None:
+            self.playback.cancel()
+
+    def interrupted(self) -> bool:
+        """
+        :return: flag whether the customer interrupted the bot and the transcript waits for get_the_message
+        """
+        barge_in = self.settings.barge_in
+        return barge_in is not None and barge_in.pending
+
+    async def get_the_message(self) -> object:
+        return await self.run_blocking(self.settings.get_the_message)
+
+
+async def run_dialog(settings, machine, nlp_settings, show_trees=True, parse=None):
+    """
+    Dialog with one customer driven by the event loop
+    :param settings: AsyncSettings object
+    :param machine: DialogMachine object of the language
+    :param nlp_settings: NLP object
+    :param show_trees: flag whether the nltk tree of every order is printed
+    :param parse: function which parses the transcript (e.g., TieredExtractor.parse), NLP.parse if not given
+    :return:
+    """
+    state = machine.start(tracer.start_session())
+    parse = parse or nlp_settings.parse
+    while not machine.is_done(state):
+        text = await settings.get_the_message()
+        turn = None
+        if text and not machine.needs_parse(state):
+            turn = extract_plain_turn(text, machine.number_words)
+        elif text:
+            order_doc = await settings.run_blocking(parse, text)
+            turn = extract_turn(nlp_settings, order_doc, text, machine.config.rejection, machine.number_words)
+            # orders answered by the tokenizer only have no dependency parse
+            if show_trees and turn['tier'] == 2 and turn['candidates']:
+                for sentence in order_doc.sents:
+                    nlp_settings.to_nltk_tree(sentence.root).pretty_print()
+
+        state, prompts = machine.step(state, turn)
+        for sentence in prompts:
+            # the customer interrupted the bot, the rest of the turn is not spoken
+            if settings.interrupted():
+                break
+            await settings.speech_generator(sentence)
+        await settings.discard_prefetched()
+        # sentences which can follow the next utterance are synthesized while the customer is speaking
+        for sentence in machine.anticipate(state):
+            settings.prefetch(sentence)
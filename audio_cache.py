@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class AudioCache(object):
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024):
+        """
+        Content-addressed on-disk store of synthesized speech. Every entry is keyed by the text, the language and
+        the voice settings, so the same sentence is synthesized only once. When the store grows over max_bytes the
+        least recently used entries are evicted. Sentences can be stored from several threads at once (e.g.,
+        prefetched answers), the index is changed under a lock.
+        :param directory: directory where mp3 files and the index are kept
+        :param max_bytes: upper bound for the total size of the stored audio
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, 'index.json')
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+        self.load_index()
+
+    @staticmethod
+    def make_key(text: str, language: str, slow: bool = False) -> str:
+        """
+        Generates the content address of the sentence
+        :param text: sentence that will be spoken
+        :param language: language of the speech
+        :param slow: voice setting of gTTS
+        :return: hex digest which is used as file name
+        """
+        content = json.dumps([text, language, bool(slow)], ensure_ascii=False)
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.mp3')
+
+    def load_index(self):
+        """
+        Reads the index of the previous sessions. Entries whose files were removed are skipped.
+        :return:
+        """
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path) as index_file:
+                stored = json.load(index_file)
+        except (OSError, ValueError):
+            return
+        for key, size in stored:
+            if os.path.exists(self.path_for(key)):
+                self.entries[key] = size
+                self.total_bytes += size
+
+    def temporary_path(self, suffix: str) -> str:
+        """
+        :return: path of a new empty file in the cache directory, unique for every writer
+        """
+        descriptor, temporary = tempfile.mkstemp(suffix=suffix, dir=self.directory)
+        os.close(descriptor)
+        return temporary
+
+    def save_index(self):
+        with self.lock:
+            temporary = self.temporary_path('.json.tmp')
+            try:
+                with open(temporary, 'w') as index_file:
+                    json.dump(list(self.entries.items()), index_file)
+                os.replace(temporary, self.index_path)
+            except BaseException:
+                os.remove(temporary)
+                raise
+
+    def get(self, text: str, language: str, slow: bool = False) -> object:
+        """
+        Looks for the sentence in the cache and marks it as recently used
+        :return: path of the mp3 file, None if the sentence was not synthesized before
+        """
+        key = self.make_key(text, language, slow)
+        with self.lock:
+            if key not in self.entries:
+                return None
+            path = self.path_for(key)
+            if not os.path.exists(path):
+                self.total_bytes -= self.entries.pop(key)
+                return None
+            self.entries.move_to_end(key)
+            return path
+
+    def read(self, text: str, language: str, slow: bool = False) -> object:
+        """
+        Reads the audio of the sentence from the cache. The file is read under the lock, so a writer or the eviction
+        of another thread cannot replace or remove it meanwhile.
+        :return: mp3 audio, None if the sentence was not synthesized before
+        """
+        with self.lock:
+            path = self.get(text, language, slow)
+            if path is None:
+                return None
+            with open(path, 'rb') as audio_file:
+                return audio_file.read()
+
+    def put(self, text: str, language: str, synthesize, slow: bool = False) -> str:
+        """
+        Synthesizes the sentence into the store
+        :param synthesize: callable that writes mp3 audio into the given path
+        :return: path of the stored mp3 file
+        """
+        key = self.make_key(text, language, slow)
+        path = self.path_for(key)
+        # synthesis runs without the lock, the same sentence may be written by two threads into their own files
+        temporary = self.temporary_path('.part')
+        try:
+            synthesize(temporary)
+        except BaseException:
+            os.remove(temporary)
+            raise
+        with self.lock:
+            os.replace(temporary, path)
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)
+            self.entries[key] = os.path.getsize(path)
+            self.total_bytes += self.entries[key]
+            self.evict()
+            self.save_index()
+        return path
+
+    def put_bytes(self, text: str, language: str, audio: bytes, slow: bool = False) -> str:
+        """
+        Stores the audio which was synthesized in memory
+        :param audio: mp3 audio of the sentence
+        :return: path of the stored mp3 file
+        """
+        def write(path):
+            with open(path, 'wb') as audio_file:
+                audio_file.write(audio)
+        return self.put(text, language, write, slow)
+
+    def evict(self):
+        """
+        Removes least recently used entries until the store fits into max_bytes. The newest entry is always kept.
+        :return:
+        """
+        with self.lock:
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                key, size = self.entries.popitem(last=False)
+                self.total_bytes -= size
+                try:
+                    os.remove(self.path_for(key))
+                except OSError:
+                    pass
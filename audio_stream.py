@@ -0,0 +1,140 @@
+import hashlib
+import io
+import shutil
+import subprocess
+import threading
+import time
+
+
+class GTTSSynthesizer(object):
+    def __init__(self, language: str, slow: bool = False):
+        """
+        gTTS synthesizer which yields mp3 chunks while the rest of the sentence is still being produced
+        :param language: language of the speech
+        :param slow: voice setting of gTTS
+        """
+        self.language = language
+        self.slow = slow
+
+    def stream(self, text: str):
+        from gtts import gTTS
+        speech_object = gTTS(text=text, lang=self.language, slow=self.slow)
+        if hasattr(speech_object, 'stream'):
+            for chunk in speech_object.stream():
+                yield chunk
+        else:
+            buffer = io.BytesIO()
+            speech_object.write_to_fp(buffer)
+            yield buffer.getvalue()
+
+
+class StubSynthesizer(object):
+    def __init__(self, chunks: int = 4, chunk_size: int = 1024, delay: float = 0.0):
+        """
+        Local stand-in of the synthesizer for tests. The same text always gives the same bytes.
+        :param chunks: number of chunks per sentence
+        :param chunk_size: bytes per chunk
+        :param delay: seconds of simulated synthesis per chunk
+        """
+        self.chunks = chunks
+        self.chunk_size = chunk_size
+        self.delay = delay
+
+    def stream(self, text: str):
+        digest = hashlib.sha1(text.encode('utf-8')).digest()
+        for index in range(self.chunks):
+            if self.delay:
+                time.sleep(self.delay)
+            yield (digest + bytes([index])) * (self.chunk_size // (len(digest) + 1))
+
+
+class PipePlayer(object):
+    commands = (['mpg123', '-q', '-'], ['ffplay', '-nodisp', '-autoexit', '-loglevel', 'quiet', '-i', '-'])
+
+    def __init__(self, command: list):
+        """
+        Plays mp3 chunks through the standard input of a player process, playback starts with the first chunk
+        :param command: command of the player which reads mp3 from its standard input
+        """
+        self.command = command
+        self.process = None
+        self.stopped = threading.Event()
+        self.first_chunk_latency = None
+
+    @classmethod
+    def default(cls) -> object:
+        """
+        :return: player of the first installed command, None if there is none
+        """
+        for command in cls.commands:
+            if shutil.which(command[0]):
+                return cls(command)
+        return None
+
+    def play(self, chunks) -> bool:
+        """
+        :param chunks: iterable of mp3 chunks
+        :return: flag whether the whole audio was played, False if the playback was stopped or the audio could not
+                 be produced or played (e.g., the connection of the synthesizer dropped)
+        """
+        start = time.perf_counter()
+        self.first_chunk_latency = None
+        self.stopped.clear()
+        completed = False
+        process = subprocess.Popen(self.command, stdin=subprocess.PIPE,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.process = process
+        try:
+            for chunk in chunks:
+                if self.stopped.is_set():
+                    break
+                if self.first_chunk_latency is None:
+                    self.first_chunk_latency = time.perf_counter() - start
+                process.stdin.write(chunk)
+                process.stdin.flush()
+            process.stdin.close()
+            process.wait()
+            completed = True
+        except OSError:
+            # requests.ConnectionError of the synthesizer is an OSError too
+            pass
+        finally:
+            # other errors of the synthesizer (e.g., gTTSError) are raised, the player must not outlive them
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            self.process = None
+        return completed and not self.stopped.is_set()
+
+    def stop(self):
+        self.stopped.set()
+        process = self.process
+        if process is not None:
+            process.kill()
+
+
+class MemoryPlayer(object):
+    def __init__(self):
+        """
+        Stand-in of the player for tests, chunks are collected in memory
+        """
+        self.played = []
+        self.stopped = threading.Event()
+        self.first_chunk_latency = None
+
+    def play(self, chunks) -> bool:
+        start = time.perf_counter()
+        self.first_chunk_latency = None
+        self.stopped.clear()
+        audio = b''
+        for chunk in chunks:
+            if self.stopped.is_set():
+                break
+            if self.first_chunk_latency is None:
+                self.first_chunk_latency = time.perf_counter() - start
+            audio += chunk
+        self.played.append(audio)
+        return not self.stopped.is_set()
+
+    def stop(self):
+        self.stopped.set()
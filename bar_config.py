@@ -0,0 +1,49 @@
+# Language. Other languages have their own modules named bar_config_<language code> (e.g., bar_config_de) with
+# the same names, they are loaded by the LanguagePool when the first customer speaks the language.
+language = 'en'
+model = 'en_core_web_sm'
+# components of the model which assign the part of speech and the dependencies
+components = ['tagger', 'parser']
+# sentences and sentence templates of the Bar class which are replaced in this language, English ones are
+# defined in the class
+prompts = {}
+# combination patterns of the drinks besides the ones of the NLP class (Double_Nouns, Adjective_Noun,
+# Double_Pronouns). Keys: combination types, Values: spaCy matcher patterns
+patterns = {}
+
+# Menu
+hot_drinks = ['black tea', 'green tea', 'jasmine', 'coffee',
+              'cappuccino', 'latte', 'americano', 'espresso']
+cold_drinks = ['ice tea', 'lemon juice', 'orange juice', 'cola', 'fanta',
+               'apple juice', 'pineapple juice', 'sprite', 'vodka',
+               'whiskey', 'jaeger', 'rom', 'brandy']
+
+# Tea is used for preventing confusion if tea is not specified by ordering. Alcohol is used to ask the age.
+tea = ['black tea', 'jasmine', 'green tea']
+# word of the unspecified tea, the bot asks which kind of tea it should be
+generic_tea = 'tea'
+alcohol = ['vodka', 'whiskey', 'jaeger', 'rom', 'brandy']
+
+another_order = 'Do you want to get something else?'
+repeat = 'I could not understand. Could you please repeat it?'
+goodbye = 'It was nice to have you. See you later!'
+rejection = ['no thanks', 'no', 'nothing', 'thanks']
+# Answers which confirm the drink the bot was not sure about
+agreements = ['yes', 'yeah', 'yep', 'sure', 'right', 'correct', 'exactly', 'of course']
+
+# Words which can appear in a short order besides the drinks. Order which has only drinks and these words is
+# answered without the tagger and the parser.
+fillers = ['a', 'an', 'the', 'i', 'want', 'would', 'like', "'d", 'to', 'have', 'get', 'take', 'give', 'me',
+           'some', 'please', 'and', 'can', 'could', 'of', 'glass', 'cup', 'one', 'two', 'with', 'for',
+           ',', '.', '!', '?']
+
+# Spelled-out numbers of the age answers (see number_parser.NumberWords)
+number_words = {
+    'units': {'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7, 'eight': 8,
+              'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12, 'thirteen': 13, 'fourteen': 14, 'fifteen': 15,
+              'sixteen': 16, 'seventeen': 17, 'eighteen': 18, 'nineteen': 19},
+    'tens': {'twenty': 20, 'thirty': 30, 'forty': 40, 'fifty': 50, 'sixty': 60, 'seventy': 70, 'eighty': 80,
+             'ninety': 90},
+    'hundred': 'hundred',
+    'conjunction': 'and',
+}
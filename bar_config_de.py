@@ -0,0 +1,60 @@
+# German configuration, the names are the same as in bar_config
+language = 'de'
+model = 'de_core_news_sm'
+# part of speech of the German model is assigned by the morphologizer
+components = ['tagger', 'morphologizer', 'parser']
+# combination patterns of the drinks besides the ones of the NLP class
+patterns = {}
+prompts = {
+    'ask_specially': 'Welchen Tee möchten Sie? Wir haben schwarzen Tee, Jasmintee und grünen Tee.',
+    'repeat_question': 'Ich habe Sie nicht verstanden. Könnten Sie das bitte wiederholen?',
+    'repeat_age': 'Entschuldigung, ich habe Sie nicht verstanden. Wie alt sind Sie?',
+    'repeat_age_short': 'Könnten Sie Ihr Alter bitte wiederholen?',
+    'not_selling': 'Das tut mir leid, das verkaufen wir hier nicht!',
+    'only_alcohol': 'Ihre Bestellung enthält nur alkoholische Getränke, die wir Ihnen wegen Ihres Alters nicht '
+                    'verkaufen dürfen!',
+    'confirm_question': 'Meinten Sie {}?',
+    'conjunction': 'und',
+    'introduction_template': 'Willkommen in der Bar. Wir servieren Ihnen heiße und kalte Getränke, ganz wie Sie '
+                             'möchten! An heißen Getränken haben wir {hot}. An kalten Getränken können wir Ihnen '
+                             '{cold} anbieten. Was möchten Sie haben?',
+    'one_drink_answer': 'Einmal {}, kommt sofort!',
+    'two_drinks_answer': 'Sie möchten {}. Kommt sofort!',
+    'many_drinks_answer': 'Sie haben {} bestellt. Kommt sofort!',
+    'partial_alcohol': 'Die alkoholischen Getränke dürfen wir Ihnen wegen Ihres Alters nicht verkaufen. {}',
+    'one_alcohol_question': 'Sie haben {} bestellt, das ist ein alkoholisches Getränk. Wie alt sind Sie?',
+    'many_alcohols_question': 'Sie haben {} bestellt, das sind alkoholische Getränke. Wie alt sind Sie?',
+}
+
+# Menu
+hot_drinks = ['schwarzer tee', 'grüner tee', 'jasmintee', 'kaffee',
+              'cappuccino', 'latte macchiato', 'americano', 'espresso']
+cold_drinks = ['eistee', 'zitronensaft', 'orangensaft', 'cola', 'fanta',
+               'apfelsaft', 'ananassaft', 'sprite', 'wodka',
+               'whiskey', 'jägermeister', 'rum', 'weinbrand']
+
+tea = ['schwarzer tee', 'jasmintee', 'grüner tee']
+generic_tea = 'tee'
+alcohol = ['wodka', 'whiskey', 'jägermeister', 'rum', 'weinbrand']
+
+another_order = 'Möchten Sie noch etwas?'
+repeat = 'Ich habe Sie nicht verstanden. Könnten Sie das bitte wiederholen?'
+goodbye = 'Schön, dass Sie da waren. Bis bald!'
+rejection = ['nein danke', 'nein', 'nichts', 'danke']
+agreements = ['ja', 'genau', 'richtig', 'gerne', 'sicher', 'natürlich']
+
+fillers = ['ein', 'eine', 'einen', 'der', 'die', 'das', 'den', 'ich', 'möchte', 'hätte', 'gern', 'gerne', 'bitte',
+           'nehme', 'und', 'mit', 'glas', 'tasse', 'zwei', 'für', 'mich', 'mir', 'einmal',
+           ',', '.', '!', '?']
+
+# the unit comes before the tens and is written together with them (e.g., 'einundzwanzig')
+number_words = {
+    'units': {'null': 0, 'ein': 1, 'eins': 1, 'eine': 1, 'zwei': 2, 'zwo': 2, 'drei': 3, 'vier': 4, 'fünf': 5,
+              'sechs': 6, 'sieben': 7, 'acht': 8, 'neun': 9, 'zehn': 10, 'elf': 11, 'zwölf': 12, 'dreizehn': 13,
+              'vierzehn': 14, 'fünfzehn': 15, 'sechzehn': 16, 'siebzehn': 17, 'achtzehn': 18, 'neunzehn': 19},
+    'tens': {'zwanzig': 20, 'dreißig': 30, 'dreissig': 30, 'vierzig': 40, 'fünfzig': 50, 'sechzig': 60,
+             'siebzig': 70, 'achtzig': 80, 'neunzig': 90},
+    'hundred': 'hundert',
+    'conjunction': 'und',
+    'units_first': True,
+}
@@ -0,0 +1,108 @@
+import argparse
+import json
+import threading
+
+from streaming_recognition import StreamingCapture, SustainedVAD
+from tracing import tracer
+
+
+class BargeIn(object):
+    def __init__(self, backend, vad, min_chunks=3, factor=1.5, end_silence=0.8, max_duration=15.0):
+        """
+        Listens to the microphone while the bot is speaking. When the customer starts to speak the playback is
+        stopped, the utterance is captured to its end and its transcript is the next message of the customer.
+        Playback must be stoppable (PipePlayer or MemoryPlayer), playsound cannot be interrupted.
+        :param backend: recognizer backend of the captured speech
+        :param vad: EnergyVAD object, its threshold is raised while the bot is speaking (see SustainedVAD)
+        :param min_chunks: number of loud chunks in a row which interrupt the bot
+        :param factor: multiplier of the energy threshold during the playback
+        :param end_silence: seconds of silence which mark the end of speech
+        :param max_duration: upper bound of the utterance in seconds
+        """
+        self.capture = StreamingCapture(backend, SustainedVAD(vad, min_chunks, factor), end_silence,
+                                        timeout=float('inf'), max_duration=max_duration, pre_roll=min_chunks + 2)
+        self.transcript = None
+        self.pending = False
+
+    def play(self, player, chunks, microphone) -> bool:
+        """
+        Plays the audio and listens at the same time
+        :param player: player of the settings
+        :param chunks: iterable of mp3 chunks
+        :param microphone: microphone (or SyntheticSource), it is opened only during the playback
+        :return: flag whether the whole audio was played or the customer interrupted it
+        """
+        cancel = threading.Event()
+        interrupted = threading.Event()
+
+        def on_speech():
+            interrupted.set()
+            player.stop()
+            tracer.count('barge_ins')
+
+        def listen():
+            with microphone as source:
+                transcript = self.capture.capture(source, on_speech, cancel)
+            if interrupted.is_set():
+                self.transcript, self.pending = transcript, True
+
+        self.capture.vad.loud_chunks = 0
+        listener = threading.Thread(target=listen, daemon=True)
+        listener.start()
+        try:
+            completed = player.play(chunks)
+        finally:
+            if not interrupted.is_set():
+                cancel.set()
+            # an interrupting customer is still speaking, the bot continues when the utterance is captured
+            with tracer.span('barge_in'):
+                listener.join()
+        return completed and not interrupted.is_set()
+
+    def take(self) -> object:
+        """
+        :return: transcript of the speech which interrupted the bot, None if it was not understood
+        """
+        transcript, self.transcript, self.pending = self.transcript, None, False
+        return transcript
+
+
+def simulate(speech_start=0.5, speech_duration=0.6, sentence_chunks=40, chunk_delay=0.05) -> dict:
+    """
+    Deterministic barge-in without audio devices: the stub synthesizer produces the sentence, the memory player
+    plays it and the synthetic microphone starts the speech of the customer at speech_start.
+    :param speech_start: second of the playback when the customer starts to speak
+    :param speech_duration: seconds of the speech of the customer
+    :param sentence_chunks: mp3 chunks of the sentence of the bot
+    :param chunk_delay: seconds of each chunk of the sentence
+    :return: dictionary of the result. Keys: completed, played (seconds of the sentence which were played),
+             sentence (seconds of the whole sentence), reaction (seconds from the start of the speech to the end of
+             the playback), transcript
+    """
+    from audio_stream import StubSynthesizer, MemoryPlayer
+    from streaming_recognition import EnergyVAD, FileBackend, SyntheticSource
+
+    player = MemoryPlayer()
+    synthesizer = StubSynthesizer(chunks=sentence_chunks, chunk_size=1024, delay=chunk_delay)
+    microphone = SyntheticSource([(speech_start, 0), (speech_duration, 3000), (2.0, 0)], chunk_size=512)
+    barge_in = BargeIn(FileBackend(['cola please']), EnergyVAD(threshold=300))
+    chunk = next(synthesizer.stream('introduction'))
+    completed = barge_in.play(player, synthesizer.stream('introduction'), microphone)
+    played = len(player.played[-1]) / float(len(chunk)) * chunk_delay
+    return {'completed': completed,
+            'played': played,
+            'sentence': sentence_chunks * chunk_delay,
+            'reaction': None if completed else played - speech_start,
+            'transcript': barge_in.take()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulates a customer who interrupts the bot')
+    parser.add_argument('--speech-start', type=float, default=0.5)
+    parser.add_argument('--speech-duration', type=float, default=0.6)
+    arguments = parser.parse_args()
+    print(json.dumps(simulate(arguments.speech_start, arguments.speech_duration), indent=2))
+
+
+if __name__ == '__main__':
+    main()
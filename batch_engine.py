@@ -0,0 +1,201 @@
+import argparse
+import json
+import sys
+from itertools import islice
+
+from bar_settings import Bar
+from menu import Menu
+from fuzzy_menu import FuzzyMenu
+from extraction_cache import ParseCache
+from tiered_extractor import TieredExtractor
+from dialog_machine import DialogMachine, extract_turn, extract_plain_turn
+from tracing import tracer
+from bar_config import hot_drinks, cold_drinks, tea, alcohol, repeat, rejection, fillers, patterns
+
+
+def read_records(lines):
+    """
+    Reads the transcripts. Each line is either a JSON object with 'transcript' and optional 'answers' and 'id'
+    fields, or the plain text of the transcript.
+    :param lines: iterable of lines (file or stdin)
+    :return: generator of records
+    """
+    for number, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('{'):
+            record = json.loads(line)
+        else:
+            record = {'transcript': line}
+        record.setdefault('id', number)
+        yield record
+
+
+def batches(records, batch_size):
+    records = iter(records)
+    batch = list(islice(records, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(records, batch_size))
+
+
+class BatchEngine(object):
+    def __init__(self, nlp=None, menu=None, batch_size=256):
+        """
+        Headless dialog engine which replays transcripts through the dialog machine of the Bar
+        :param nlp: NLP object, created if not given
+        :param menu: Menu object, created from bar_config if not given
+        :param batch_size: number of transcripts parsed together by the spaCy pipe
+        """
+        if nlp is None:
+            # spaCy is imported only when the engine loads its own model
+            from nlp_settings import NLP
+            nlp = NLP(patterns=patterns, cache=ParseCache())
+        self.nlp = nlp
+        self.menu = menu or Menu(cold_drinks, hot_drinks, tea, alcohol)
+        self.batch_size = batch_size
+        self.fuzzy = FuzzyMenu(self.menu)
+        self.bar = Bar(None, self.nlp, self.menu, self.fuzzy)
+        self.machine = DialogMachine(self.bar)
+        self.extractor = TieredExtractor(self.nlp, self.menu, rejection, fillers, self.fuzzy)
+
+    def process(self, record: dict, order_doc) -> dict:
+        """
+        Steps the dialog machine with the transcript and then with the scripted follow-up answers until the order
+        is answered
+        :param record: transcript and scripted follow-up answers (None for speech which was not understood)
+        :param order_doc: parsed transcript
+        :return: structured decision. Keys: id, transcript, is_order, rejected, drinks, available, case, response,
+                 prompts (every sentence of the bot), tier
+        """
+        turn = extract_turn(self.nlp, order_doc, record['transcript'], rejection)
+        decision = {'id': record['id'], 'transcript': record['transcript'],
+                    'is_order': turn['rejected'] or bool(turn['candidates']), 'tier': turn['tier']}
+        if not decision['is_order']:
+            decision.update({'rejected': False, 'drinks': [], 'available': False, 'case': 0, 'response': repeat,
+                             'prompts': [repeat]})
+            return decision
+
+        state, prompts = self.machine.step(self.machine.start(str(record['id'])), turn)
+        answers = list(record.get('answers', []))
+        while state.state != 'order' and not self.machine.is_done(state):
+            if not answers:
+                decision['error'] = 'bot asked more questions than the script answers'
+                break
+            answer = answers.pop(0)
+            if answer and not self.machine.needs_parse(state):
+                turn = extract_plain_turn(answer, self.machine.number_words)
+            else:
+                turn = extract_turn(self.nlp, self.extractor.parse(answer), answer, rejection) if answer else None
+            state, sentences = self.machine.step(state, turn)
+            prompts += sentences
+
+        rejected = self.machine.is_done(state)
+        drinks = state.served or []
+        if rejected or state.served is None:
+            response = None
+        elif drinks or state.case:
+            response = self.machine.templates.answer(drinks, state.case)
+        else:
+            response = self.bar.not_selling
+        decision.update({'rejected': rejected, 'drinks': drinks, 'available': bool(drinks) or state.case != 0,
+                         'case': state.case, 'response': response, 'prompts': prompts})
+        return decision
+
+    def process_batch(self, batch: list) -> list:
+        """
+        Parses the batch with one nlp.pipe call. Short orders which match the menu are answered by the tokenizer
+        (tier one), repeated transcripts are parsed once and taken from the cache.
+        :param batch: list of records
+        :return: list of decisions
+        """
+        texts = [' '.join(record['transcript'].lower().split()) for record in batch]
+        docs = [self.extractor.fast_path(text) for text in texts]
+        missing = [text for (text, order_doc) in zip(texts, docs) if order_doc is None]
+        if self.nlp.cache is not None:
+            missing = [text for text in dict.fromkeys(missing) if text not in self.nlp.cache.docs]
+        parsed = dict(zip(missing, self.nlp.tokenizer.pipe(missing, batch_size=self.batch_size)))
+        decisions = []
+        for record, text, order_doc in zip(batch, texts, docs):
+            if order_doc is None:
+                order_doc = parsed.get(text)
+                if order_doc is None:
+                    order_doc = self.nlp.parse(text)
+                elif self.nlp.cache is not None:
+                    self.nlp.cache.store(text, order_doc)
+                order_doc.user_data['tier'] = 2
+            decisions.append(self.process(record, order_doc))
+        return decisions
+
+    def run(self, records):
+        """
+        :param records: iterable of records
+        :return: generator of decisions in the order of the records
+        """
+        for batch in batches(records, self.batch_size):
+            for decision in self.process_batch(batch):
+                yield decision
+
+
+worker_engine = None
+
+
+def init_worker(batch_size, traced=False):
+    global worker_engine
+    worker_engine = BatchEngine(batch_size=batch_size)
+    # measurements of the worker are sent to the parent with every batch, inherited ones are dropped
+    tracer.enabled = traced
+    tracer.take()
+
+
+def run_worker_batch(batch):
+    return worker_engine.process_batch(batch), tracer.take()
+
+
+def run_parallel(records, workers: int, batch_size: int):
+    """
+    Distributes the batches over worker processes, each of them loads its own model once.
+    :return: generator of decisions in the order of the records
+    """
+    from multiprocessing import Pool
+    with Pool(workers, initializer=init_worker, initargs=(batch_size, tracer.enabled)) as pool:
+        for decisions, measurements in pool.imap(run_worker_batch, batches(records, batch_size)):
+            tracer.merge(measurements)
+            for decision in decisions:
+                yield decision
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replays transcripts through the bar dialog logic')
+    parser.add_argument('input', nargs='?', help='JSONL or plain text file of transcripts, stdin if not given')
+    parser.add_argument('-o', '--output', help='JSONL file for decisions, stdout if not given')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--trace', help='file of the measurements (.prom for the Prometheus text format, JSON '
+                                        'otherwise)')
+    arguments = parser.parse_args()
+    if arguments.trace:
+        tracer.enabled = True
+
+    source = open(arguments.input) if arguments.input else sys.stdin
+    target = open(arguments.output, 'w') if arguments.output else sys.stdout
+    records = read_records(source)
+    if arguments.workers > 1:
+        decisions = run_parallel(records, arguments.workers, arguments.batch_size)
+    else:
+        decisions = BatchEngine(batch_size=arguments.batch_size).run(records)
+    try:
+        for decision in decisions:
+            target.write(json.dumps(decision) + '\n')
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+        if arguments.trace:
+            tracer.export(arguments.trace)
+
+
+if __name__ == '__main__':
+    main()
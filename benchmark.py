@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+from collections import deque, defaultdict
+
+import speech_recognition as sr
+
+import bar_config
+from default_settings import Settings
+from bar_settings import Bar
+from nlp_settings import NLP
+from menu import Menu
+from fuzzy_menu import FuzzyMenu
+from extraction_cache import ParseCache
+from tiered_extractor import TieredExtractor
+from model_registry import resident_memory
+from audio_stream import StubSynthesizer, MemoryPlayer
+from async_runtime import AsyncSettings, run_dialog
+from dialog_machine import DialogMachine
+from scenarios import scenarios
+
+
+class FakeMicrophone(object):
+    SAMPLE_RATE = 16000
+    SAMPLE_WIDTH = 2
+    CHUNK = 1024
+    device_index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+class FakeRecognizer(object):
+    def __init__(self, delay: float = 0.0):
+        """
+        Stand-in of speech_recognition.Recognizer which returns scripted transcripts
+        :param delay: seconds of simulated recognition per utterance
+        """
+        self.energy_threshold = 300
+        self.delay = delay
+        self.transcripts = deque()
+
+    def script(self, transcripts):
+        self.transcripts = deque(transcripts)
+
+    def adjust_for_ambient_noise(self, source, duration=1):
+        pass
+
+    def listen(self, source):
+        return self.transcripts.popleft() if self.transcripts else None
+
+    def recognize_google(self, audio_customer, language=None):
+        if self.delay:
+            time.sleep(self.delay)
+        if audio_customer is None:
+            raise sr.UnknownValueError()
+        return audio_customer
+
+
+class StageTimer(object):
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def wrap(self, owner, attribute: str, stage: str):
+        """
+        Replaces the attribute of the object with a timed version of it
+        :param owner: object whose method (or callable attribute) is timed
+        :param attribute: name of the attribute
+        :param stage: name of the stage in the report
+        :return:
+        """
+        function = getattr(owner, attribute)
+        samples = self.samples[stage]
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+
+        setattr(owner, attribute, timed)
+
+
+class TimedPipeline(object):
+    def __init__(self, pipeline, samples):
+        self.pipeline = pipeline
+        self.samples = samples
+
+    def __call__(self, text):
+        start = time.perf_counter()
+        try:
+            return self.pipeline(text)
+        finally:
+            self.samples.append(time.perf_counter() - start)
+
+    def __getattr__(self, item):
+        return getattr(self.pipeline, item)
+
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = fraction * (len(ordered) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(values: list) -> dict:
+    return {'count': len(values),
+            'mean': sum(values) / len(values) if values else 0.0,
+            'p50': percentile(values, 0.5),
+            'p90': percentile(values, 0.9),
+            'p99': percentile(values, 0.99),
+            'max': max(values) if values else 0.0}
+
+
+def build(timer: StageTimer, asr_delay: float, tts_delay: float) -> tuple:
+    """
+    Builds the dialog like Station.configure does (fuzzy menu, tiered extraction, parse cache) with fake audio I/O
+    :return: tuple (recognizer, AsyncSettings object, DialogMachine object, NLP object, TieredExtractor object)
+    """
+    config = bar_config
+    recognizer = FakeRecognizer(asr_delay)
+    synthesizer = StubSynthesizer(delay=tts_delay)
+    player = MemoryPlayer()
+    settings = Settings(FakeMicrophone(), recognizer, config.language, synthesizer=synthesizer, player=player)
+    settings.calibrator.calibrated = True
+    nlp_settings = NLP(patterns=config.patterns, cache=ParseCache(), model=config.model, components=config.components)
+    menu = Menu(config.cold_drinks, config.hot_drinks, config.tea, config.alcohol)
+    fuzzy_menu = FuzzyMenu(menu)
+    machine = DialogMachine(Bar(settings, nlp_settings, menu, fuzzy_menu, config))
+    extractor = TieredExtractor(nlp_settings, menu, config.rejection, config.fillers, fuzzy_menu)
+
+    timer.wrap(recognizer, 'recognize_google', 'recognize')
+    timer.wrap(synthesizer, 'stream', 'synthesize')
+    timer.wrap(player, 'play', 'playback')
+    timer.wrap(nlp_settings, 'collect_compounds', 'match')
+    timer.wrap(nlp_settings, 'collect_pos', 'collect_pos')
+    timer.wrap(machine, 'step', 'decide')
+    timer.wrap(extractor, 'fast_path', 'tier_one')
+    nlp_settings.tokenizer = TimedPipeline(nlp_settings.tokenizer, timer.samples['parse'])
+    async_settings = AsyncSettings(settings)
+    timer.wrap(async_settings, 'get_the_message', 'listen')
+    return recognizer, async_settings, machine, nlp_settings, extractor
+
+
+def run_benchmark(iterations: int, names: list, asr_delay: float = 0.0, tts_delay: float = 0.0) -> dict:
+    """
+    Replays the scripted dialogs through the main dialog loop with fake microphone, recognizer and synthesizer
+    :param iterations: number of replays of every scenario
+    :param names: names of the scenarios
+    :param asr_delay: seconds of simulated recognition per utterance
+    :param tts_delay: seconds of simulated synthesis per chunk
+    :return: machine-readable report
+    """
+    timer = StageTimer()
+    recognizer, async_settings, machine, nlp_settings, extractor = build(timer, asr_delay, tts_delay)
+    dialogs = defaultdict(list)
+    turns = 0
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for name in names:
+            recognizer.script(scenarios[name])
+            begin = time.perf_counter()
+            asyncio.run(run_dialog(async_settings, machine, nlp_settings, show_trees=False, parse=extractor.parse))
+            dialogs[name].append(time.perf_counter() - begin)
+            turns += len(scenarios[name])
+    elapsed = time.perf_counter() - start
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'iterations': iterations,
+            'elapsed': elapsed,
+            'throughput': {'dialogs_per_second': iterations * len(names) / elapsed,
+                           'turns_per_second': turns / elapsed},
+            'peak_memory': peak_memory,
+            'resident_memory': resident_memory(),
+            'dialogs': {name: summarize(values) for (name, values) in dialogs.items()},
+            'stages': {stage: summarize(values) for (stage, values) in timer.samples.items()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end latency benchmark of the bar dialog')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--scenario', action='append', choices=sorted(scenarios),
+                        help='scenario to replay, all of them if not given')
+    parser.add_argument('--asr-delay', type=float, default=0.0)
+    parser.add_argument('--tts-delay', type=float, default=0.0)
+    parser.add_argument('-o', '--output', help='JSON file of the report, stdout if not given')
+    arguments = parser.parse_args()
+
+    report = run_benchmark(arguments.iterations, arguments.scenario or sorted(scenarios),
+                           arguments.asr_delay, arguments.tts_delay)
+    if arguments.output:
+        with open(arguments.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == '__main__':
+    main()
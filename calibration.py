@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+
+class MicCalibrator(object):
+    def __init__(self, microphone, recognizer, store_path, duration=4, sample_duration=0.3, interval=5.0,
+                 smoothing=0.3, min_change=0.05):
+        """
+        Calibrates the energy threshold of the recognizer once per device and keeps it up to date with a background
+        sampler which measures the noise floor between the turns. The sampler is paused while the bot is speaking,
+        otherwise the speech of the bot would be taken for noise.
+        :param microphone: speech_recognition microphone
+        :param recognizer: speech_recognition recognizer
+        :param store_path: json file where thresholds of the devices are persisted
+        :param duration: seconds of the full calibration
+        :param sample_duration: seconds of one background sample
+        :param interval: seconds between background samples
+        :param smoothing: weight of the new sample in the threshold (0 keeps the old one, 1 takes the new one)
+        :param min_change: relative change of the threshold which is persisted, smaller drifts are only kept in
+                           memory
+        """
+        self.microphone = microphone
+        self.recognition = recognizer
+        self.store_path = store_path
+        self.duration = duration
+        self.sample_duration = sample_duration
+        self.interval = interval
+        self.smoothing = smoothing
+        self.min_change = min_change
+        self.calibrated = False
+        self.saved_threshold = None
+        self.lock = threading.Lock()
+        self.listening_flag = threading.Event()
+        self.pause_lock = threading.Lock()
+        self.pauses = 0
+        self.pause_count = 0
+        self.stop_flag = threading.Event()
+        self.sampler = None
+
+    def device_key(self) -> str:
+        device_index = getattr(self.microphone, 'device_index', None)
+        return 'default' if device_index is None else str(device_index)
+
+    def read_store(self) -> dict:
+        try:
+            with open(self.store_path) as store:
+                return json.load(store)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        thresholds = self.read_store()
+        thresholds[self.device_key()] = self.recognition.energy_threshold
+        temporary = self.store_path + '.tmp'
+        with open(temporary, 'w') as store:
+            json.dump(thresholds, store)
+        os.replace(temporary, self.store_path)
+        self.saved_threshold = self.recognition.energy_threshold
+
+    def load(self) -> bool:
+        """
+        Loads the persisted threshold of the device
+        :return: flag whether the threshold was found or not
+        """
+        threshold = self.read_store().get(self.device_key())
+        if threshold is None:
+            return False
+        self.recognition.energy_threshold = threshold
+        self.saved_threshold = threshold
+        self.calibrated = True
+        return True
+
+    def calibrate(self):
+        """
+        Full calibration of the microphone. It blocks for the given duration.
+        :return:
+        """
+        with self.lock:
+            with self.microphone as source:
+                self.recognition.adjust_for_ambient_noise(source, duration=self.duration)
+        self.calibrated = True
+        self.save()
+
+    @contextmanager
+    def listening(self):
+        """
+        Holds the microphone for listening. Background sampler does not start a new sample meanwhile.
+        :return:
+        """
+        self.listening_flag.set()
+        try:
+            with self.lock:
+                yield
+        finally:
+            self.listening_flag.clear()
+
+    @contextmanager
+    def paused(self):
+        """
+        Pauses the background sampler while the bot is speaking. A sample which overlaps the speech is discarded.
+        :return:
+        """
+        with self.pause_lock:
+            self.pauses += 1
+            self.pause_count += 1
+        try:
+            yield
+        finally:
+            with self.pause_lock:
+                self.pauses -= 1
+
+    def sample(self):
+        """
+        Measures the noise floor shortly and merges it into the current threshold. The threshold is persisted when
+        it moved more than min_change from the persisted one.
+        :return:
+        """
+        if self.listening_flag.is_set() or self.pauses or not self.lock.acquire(blocking=False):
+            return
+        try:
+            previous = self.recognition.energy_threshold
+            pause_count = self.pause_count
+            with self.microphone as source:
+                self.recognition.adjust_for_ambient_noise(source, duration=self.sample_duration)
+            if self.pauses or pause_count != self.pause_count:
+                self.recognition.energy_threshold = previous
+                return
+            self.recognition.energy_threshold = (1 - self.smoothing) * previous + \
+                self.smoothing * self.recognition.energy_threshold
+        finally:
+            self.lock.release()
+        saved = self.saved_threshold
+        if saved is None or abs(self.recognition.energy_threshold - saved) > self.min_change * saved:
+            self.save()
+
+    def run_sampler(self):
+        while not self.stop_flag.wait(self.interval):
+            try:
+                self.sample()
+            except (OSError, IOError) as e:
+                print("Background calibration failed; {0}".format(e))
+
+    def start_sampler(self):
+        if self.sampler is not None:
+            return
+        self.stop_flag.clear()
+        self.sampler = threading.Thread(target=self.run_sampler, name='mic-sampler', daemon=True)
+        self.sampler.start()
+
+    def stop_sampler(self):
+        if self.sampler is None:
+            return
+        self.stop_flag.set()
+        self.sampler.join()
+        self.sampler = None
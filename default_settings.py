@@ -1,48 +1,106 @@
 from gtts import gTTS
 import os
+import tempfile
 import speech_recognition as sr
 from playsound import playsound
+from calibration import MicCalibrator
+from audio_stream import GTTSSynthesizer, PipePlayer
+from streaming_recognition import GoogleBackend
+from tracing import tracer
 
 
 class Settings(object):
 
-    def __init__(self, microphone, recognizer, language):
+    def __init__(self, microphone, recognizer, language, cache=None, capture=None, synthesizer=None, player=None,
+                 barge_in=None, data_dir=None):
         self.microphone = microphone
         self.recognition = recognizer
         self.language = language
-        self.path_for_music = 'code directory here'
+        self.slow = False
+        self.cache = cache
+        self.capture = capture
+        self.synthesizer = synthesizer or GTTSSynthesizer(language, self.slow)
+        self.player = player or PipePlayer.default()
+        # customer can interrupt the bot only if the playback can be stopped
+        self.barge_in = barge_in if self.player is not None else None
+        # directory of the audio and parse caches, the orders and the calibration, the code directory if not given
+        self.path_for_music = data_dir or os.path.dirname(os.path.abspath(__file__))
+        os.makedirs(self.path_for_music, exist_ok=True)
+        self.calibrator = MicCalibrator(microphone, recognizer, os.path.join(self.path_for_music, 'calibration.json'))
 
+    def select_language(self, language: str):
+        """
+        Switches the recognition and the synthesis to the language of the next customer. Cached sentences are
+        kept per language.
+        :param language: language code (e.g., 'en', 'de')
+        :return:
+        """
+        self.language = language
+        if isinstance(self.synthesizer, GTTSSynthesizer):
+            self.synthesizer.language = language
+        for capture in (self.capture, self.barge_in and self.barge_in.capture):
+            if capture is not None and isinstance(capture.backend, GoogleBackend):
+                capture.backend.language = language
+
+    @tracer.timed('calibration')
     def init_mic(self):
         """
         The method is used to calibrate the microphone before the interaction. User is informed
         by the computer about waiting time for calibration. At the end it plays 'beep' for showing
-        that microphone is ready.
+        that microphone is ready. If the device was calibrated before, its persisted threshold is used.
+        Afterwards the background sampler keeps the threshold up to date between the turns.
         :return:
         """
-        print("Please wait, microphone is callibrating now. It will take 4 seconds.")
-        print("You can speak after the beep sound.")
-        with self.microphone as source:
-            self.recognition.adjust_for_ambient_noise(source, duration=4)
-        path = os.path.join(self.path_for_music, 'beep.mp3')
-        playsound(path)
+        if not self.calibrator.load():
+            print("Please wait, microphone is callibrating now. It will take 4 seconds.")
+            print("You can speak after the beep sound.")
+            self.calibrator.calibrate()
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'beep.mp3')
+            playsound(path)
+        self.calibrator.start_sampler()
 
     def get_the_message(self):
         """
-        The method is used in order to get the answers from the user.
+        The method is used in order to get the answers from the user. If streaming capture is set, audio chunks
+        are sent to its recognizer backend while the user is speaking. If the user interrupted the bot, the speech
+        captured during the playback is returned without listening again.
         :return:
         """
-        self.init_mic()
+        if self.barge_in is not None and self.barge_in.pending:
+            speech_customer = self.barge_in.take()
+            if speech_customer is None:
+                tracer.count('recognition_failures')
+            return speech_customer
+        if not self.calibrator.calibrated:
+            self.init_mic()
+        if self.capture is not None:
+            with self.calibrator.listening(), tracer.span('capture'):
+                with self.microphone as source:
+                    speech_customer = self.capture.capture(source)
+            if tracer.enabled and self.capture.latencies['chunks']:
+                # every chunk fed to the backend while the customer was speaking, then end of speech to transcript
+                for latency in self.capture.latencies['chunks']:
+                    tracer.observe('capture_feed', latency)
+                tracer.observe('capture_finish', self.capture.latencies['finish'])
+            if speech_customer is None:
+                tracer.count('recognition_failures')
+            return speech_customer
         speech_customer = ''
-        with self.microphone as source:
-            audio_customer = self.recognition.listen(source)
+        with self.calibrator.listening(), tracer.span('listen'):
+            with self.microphone as source:
+                audio_customer = self.recognition.listen(source)
         try:
-            speech_customer = self.recognition.recognize_google(audio_customer)
+            with tracer.span('recognize'):
+                speech_customer = self.recognition.recognize_google(audio_customer, language=self.language)
             return speech_customer
         except sr.UnknownValueError:
+            tracer.count('recognition_failures')
             print("Google Speech Recognition could not understand what you said!")
         except sr.RequestError as e:
+            tracer.count('request_errors')
             print("Could not request results from Google SRS; {0}".format(e))
 
+    @tracer.timed('speak')
     def speech_generator(self, response):
         """
         The method is used to convert the sentence to mp3 file. That mp3 file will be used as
@@ -50,8 +108,116 @@ class Settings(object):
         :param response: string answer of the user
         :return:
         """
-        speech_object = gTTS(text=response, lang=self.language, slow=False)
-        path = os.path.join(self.path_for_music, 'response.mp3')
+        if self.player is not None:
+            self.stream_speech(response)
+            return
+        path, temporary = self.synthesize(response)
+        with self.calibrator.paused(), tracer.span('playback'):
+            playsound(path)
+        if temporary:
+            os.remove(path)
+
+    def stream_speech(self, response, audio=None) -> bool:
+        """
+        The method plays the sentence without any file: playback starts with the first synthesized chunk while
+        the rest is still being produced. Synthesized audio is stored in the cache afterwards.
+        :param response: sentence that will be spoken
+        :param audio: mp3 audio of the sentence if it was synthesized before
+        :return: flag whether the whole sentence was played or the playback was stopped
+        """
+        if audio is None and self.cache is not None:
+            audio = self.cache.read(response, self.language, self.slow)
+        if audio is not None:
+            return self.play([audio])
+
+        produced = []
+
+        def chunks():
+            for chunk in self.synthesizer.stream(response):
+                produced.append(chunk)
+                yield chunk
+
+        completed = self.play(chunks())
+        if completed and self.cache is not None:
+            self.cache.put_bytes(response, self.language, b''.join(produced), self.slow)
+        return completed
+
+    def play(self, chunks) -> bool:
+        """
+        Plays the audio through the player. With barge-in the microphone is listened during the playback and the
+        customer can interrupt the bot, then the next get_the_message returns what the customer said. While that
+        transcript is pending the microphone is not listened again, so it cannot be overwritten.
+        :param chunks: iterable of mp3 chunks
+        :return: flag whether the whole audio was played
+        """
+        if self.barge_in is None or self.barge_in.pending:
+            with self.calibrator.paused():
+                completed = self.player.play(chunks)
+        else:
+            if not self.calibrator.calibrated:
+                self.init_mic()
+            with self.calibrator.listening():
+                completed = self.barge_in.play(self.player, chunks, self.microphone)
+        # time until the first chunk of the sentence reached the player
+        if tracer.enabled and self.player.first_chunk_latency is not None:
+            tracer.observe('first_audio', self.player.first_chunk_latency)
+        return completed
+
+    @tracer.timed('synthesis')
+    def synthesize_audio(self, response) -> bytes:
+        """
+        The method converts the sentence to mp3 audio in memory
+        :param response: sentence that will be spoken
+        :return: mp3 audio
+        """
+        if self.cache is not None:
+            audio = self.cache.read(response, self.language, self.slow)
+            if audio is not None:
+                return audio
+        audio = b''.join(self.synthesizer.stream(response))
+        if self.cache is not None:
+            self.cache.put_bytes(response, self.language, audio, self.slow)
+        return audio
+
+    @tracer.timed('synthesis')
+    def synthesize(self, response) -> tuple:
+        """
+        The method converts the sentence to mp3 file without playing it. Every temporary file has its own name,
+        so the next sentence can be synthesized while the current one is playing.
+        :param response: sentence that will be spoken
+        :return: path of the mp3 file and flag whether the file should be removed after playing
+        """
+        if self.cache is not None:
+            return self.cached_speech(response), False
+        speech_object = gTTS(text=response, lang=self.language, slow=self.slow)
+        handle, path = tempfile.mkstemp(prefix='response_', suffix='.mp3', dir=self.path_for_music)
+        os.close(handle)
         speech_object.save(path)
-        playsound(path)
-        os.remove(path)
+        return path, True
+
+    def cached_speech(self, response, language=None) -> str:
+        """
+        The method returns the mp3 file of the sentence from the audio cache. Sentence is synthesized only if it
+        was not spoken before with the same language and voice settings.
+        :param response: sentence that will be spoken
+        :param language: language of the sentence, the current language if None
+        :return: path of the mp3 file in the cache
+        """
+        language = language or self.language
+        path = self.cache.get(response, language, self.slow)
+        if path is None:
+            speech_object = gTTS(text=response, lang=language, slow=self.slow)
+            path = self.cache.put(response, language, speech_object.save, self.slow)
+        return path
+
+    def prewarm(self, sentences, language=None):
+        """
+        The method synthesizes all static sentences before the interaction, so they are only played afterwards.
+        :param sentences: list of sentences that bot will use
+        :param language: language of the sentences, the current language if None
+        :return:
+        """
+        if self.cache is None:
+            return
+        for sentence in sentences:
+            self.cached_speech(sentence, language)
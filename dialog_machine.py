@@ -0,0 +1,348 @@
+import json
+import time
+from collections import namedtuple
+
+from number_parser import NumberWords, extract_numbers, english
+from tracing import tracer
+
+
+# Dialog of the bar as data. Every state has an ordered list of transitions (guard, action, next state): the first
+# transition whose guard holds runs its action, None guard always holds and None action says nothing. Listening
+# states wait for the next utterance of the customer, the others are passed through in the same turn. A state without
+# transitions ends the dialog. Utterances heard in a state with parse False are not parsed, only their numbers are
+# extracted (see extract_plain_turn).
+DIALOG = {
+    'order': {'listen': True, 'transitions': [
+        ('not_understood', 'ask_repeat', 'order'),
+        ('rejected', 'say_goodbye', 'done'),
+        ('no_drinks', 'ask_repeat', 'order'),
+        ('unspecified_tea', 'ask_tea', 'tea'),
+        (None, 'take_order', 'resolve')]},
+    'tea': {'listen': True, 'transitions': [
+        ('not_tea', 'ask_repeat_question', 'tea'),
+        (None, 'take_tea', 'resolve')]},
+    'resolve': {'listen': False, 'transitions': [
+        ('uncertain', 'ask_confirmation', 'confirm'),
+        (None, None, 'check')]},
+    'confirm': {'listen': True, 'transitions': [
+        ('agreed', 'accept_drink', 'resolve'),
+        (None, 'drop_drink', 'resolve')]},
+    'check': {'listen': False, 'transitions': [
+        ('nothing_available', 'say_not_selling', 'order'),
+        ('age_unknown', 'ask_age', 'age'),
+        (None, 'serve', 'order')]},
+    'age': {'listen': True, 'parse': False, 'transitions': [
+        ('not_understood', 'ask_age_again_short', 'age'),
+        ('no_number', 'ask_age_again', 'age'),
+        (None, 'verify_age', 'check')]},
+    'done': {'listen': False, 'transitions': []},
+}
+
+# Whole state of one dialog. It is small and made of plain data, so it can be serialized, moved to another worker
+# and resumed there.
+#   pending: possible drinks of the current order, confirming: the one the customer is asked about,
+#   ordered: time when the order was heard, served and case: result of the last order (None if there is none yet)
+DialogState = namedtuple('DialogState', ['session', 'state', 'pending', 'confirming', 'verified_age', 'ordered',
+                                         'served', 'case'])
+
+
+def extract_turn(nlp, order_doc, text: str, rejection: list, number_words: NumberWords = english) -> dict:
+    """
+    Plain data of the parsed utterance which the dialog machine needs
+    :param nlp: NLP object
+    :param order_doc: parsed utterance
+    :param text: transcript of the utterance
+    :param rejection: list of possible 'kind' rejections of ordering something
+    :param number_words: spelled-out numbers of the language (see DialogMachine.number_words)
+    :return: dictionary of the extraction. Keys: tokens, candidates (possible drinks), numbers, rejected, tier
+    """
+    return {'tokens': nlp.list_of_tokens(order_doc),
+            'candidates': [str(each) for each in nlp.extract_drinks(order_doc)],
+            'numbers': extract_numbers(text, number_words),
+            'rejected': nlp.is_rejection(order_doc, rejection),
+            'tier': order_doc.user_data.get('tier', 2)}
+
+
+def extract_plain_turn(text: str, number_words: NumberWords = english) -> dict:
+    """
+    Extraction of the utterance without parsing it, answers to the age question only need their numbers
+    :param text: transcript of the utterance
+    :param number_words: spelled-out numbers of the language
+    :return: dictionary of the extraction (see extract_turn), tier 0 means the utterance was not parsed
+    """
+    return {'tokens': text.lower().split(),
+            'candidates': [],
+            'numbers': extract_numbers(text, number_words),
+            'rejected': False,
+            'tier': 0}
+
+
+class ResponseTemplates(object):
+    def __init__(self, bar, max_entries=4096):
+        """
+        Sentences of the bot rendered once per menu: answers for every single beverage, age questions for every
+        alcoholic beverage and confirmation questions. Combinations of several beverages are rendered on first use
+        and kept.
+        :param bar: Bar object of the menu and the language
+        :param max_entries: upper bound of kept combinations
+        """
+        self.bar = bar
+        self.max_entries = max_entries
+        self.answers = {}
+        self.age_questions = {}
+        for name in bar.menu.items:
+            for case in (0, 1):
+                self.answers[((name,), case)] = bar.answer_to_the_order([name], case=case)
+        for name in bar.menu.alcohol:
+            self.age_questions[(name,)] = bar.age_question([(0, name)])
+        self.confirmations = {name: bar.confirm_question.format(name) for name in bar.menu.items}
+
+    def answer(self, drinks, case) -> str:
+        """
+        :param drinks: served beverages
+        :param case: case of the age check (see Bar.answer_to_the_order)
+        :return: answer of the bot to the order
+        """
+        if case == 2:
+            return self.bar.only_alcohol
+        key = (tuple(drinks), case)
+        sentence = self.answers.get(key)
+        if sentence is None:
+            sentence = self.bar.answer_to_the_order(list(drinks), case=case)
+            if len(self.answers) < self.max_entries:
+                self.answers[key] = sentence
+        return sentence
+
+    def age_question(self, alcohols) -> str:
+        """
+        :param alcohols: list of tuples of alcoholic beverages and their indexes
+        :return: sentence that asks the age
+        """
+        key = tuple(name for (_, name) in alcohols)
+        sentence = self.age_questions.get(key)
+        if sentence is None:
+            sentence = self.bar.age_question(alcohols)
+            if len(self.age_questions) < self.max_entries:
+                self.age_questions[key] = sentence
+        return sentence
+
+    def confirmation(self, name: str) -> str:
+        return self.confirmations.get(name) or self.bar.confirm_question.format(name)
+
+
+class DialogMachine(object):
+    def __init__(self, bar, spec=None):
+        """
+        Dialog of the bar compiled once from its description: guards and actions are resolved to methods and the
+        description is checked before the first customer comes. The machine holds no state of the dialogs, each
+        step takes a DialogState and returns the next one, so one machine serves any number of interleaved dialogs.
+        :param bar: Bar object which makes the decisions (menu, prompts and configuration of the language)
+        :param spec: description of the dialog, DIALOG if None
+        """
+        self.bar = bar
+        self.config = bar.config
+        self.number_words = NumberWords(**self.config.number_words)
+        self.templates = ResponseTemplates(bar)
+        spec = spec or DIALOG
+        self.table = self.compile(spec)
+        self.unparsed = {name for (name, node) in spec.items() if not node.get('parse', True)}
+
+    def compile(self, spec: dict) -> dict:
+        """
+        :param spec: description of the dialog (see DIALOG)
+        :return: dictionary of states. Values: tuple (flag whether the state listens, tuple of transitions with
+                 resolved guards and actions)
+        """
+        table = {}
+        for name, node in spec.items():
+            transitions = []
+            for guard, action, target in node['transitions']:
+                if target not in spec:
+                    raise ValueError('state {} goes to unknown state {}'.format(name, target))
+                if guard is not None and not hasattr(self, 'when_' + guard):
+                    raise ValueError('unknown guard {} in state {}'.format(guard, name))
+                if action is not None and not hasattr(self, 'do_' + action):
+                    raise ValueError('unknown action {} in state {}'.format(action, name))
+                transitions.append((getattr(self, 'when_' + guard) if guard is not None else None,
+                                    getattr(self, 'do_' + action) if action is not None else None,
+                                    target))
+            if transitions and transitions[-1][0] is not None:
+                raise ValueError('last transition of state {} must have no guard'.format(name))
+            table[name] = (node['listen'], tuple(transitions))
+        return table
+
+    def start(self, session: str) -> DialogState:
+        return DialogState(session, 'order', [], None, None, None, None, 0)
+
+    def is_done(self, state: DialogState) -> bool:
+        return not self.table[state.state][1]
+
+    def needs_parse(self, state: DialogState) -> bool:
+        """
+        :return: flag whether the next utterance has to be parsed, extract_plain_turn is enough otherwise
+        """
+        return state.state not in self.unparsed
+
+    def step(self, state: DialogState, turn) -> tuple:
+        """
+        Runs the transitions for one utterance of the customer until the machine waits for the next one
+        :param state: state of the dialog
+        :param turn: extraction of the utterance (see extract_turn), None if the speech was not understood
+        :return: tuple (next state of the dialog, list of sentences of the bot)
+        """
+        prompts = []
+        with tracer.span('decide'):
+            while not self.is_done(state):
+                for guard, action, target in self.table[state.state][1]:
+                    if guard is None or guard(state, turn):
+                        if action is not None:
+                            state, sentences = action(state, turn)
+                            prompts += sentences
+                        state = state._replace(state=target)
+                        break
+                turn = None
+                if self.table[state.state][0]:
+                    break
+        return state, prompts
+
+    @staticmethod
+    def snapshot(state: DialogState) -> str:
+        """
+        :return: compact JSON of the state of the dialog
+        """
+        return json.dumps(list(state), separators=(',', ':'))
+
+    def resume(self, snapshot: str) -> DialogState:
+        """
+        :param snapshot: JSON made by snapshot (possibly by another worker)
+        :return: state of the dialog
+        """
+        state = DialogState(*json.loads(snapshot))
+        if state.state not in self.table:
+            raise ValueError('unknown state {}'.format(state.state))
+        return state
+
+    def available(self, state: DialogState) -> list:
+        """
+        :return: names of the pending drinks which are in the menu
+        """
+        return self.bar.is_available(state.pending)
+
+    def is_tea(self, candidate) -> bool:
+        name, uncertain = self.bar.match_drink(candidate)
+        return not uncertain and self.bar.menu.is_tea(name)
+
+    # guards
+
+    def when_not_understood(self, state, turn) -> bool:
+        return turn is None
+
+    def when_rejected(self, state, turn) -> bool:
+        return turn['rejected']
+
+    def when_no_drinks(self, state, turn) -> bool:
+        return not turn['candidates']
+
+    def when_unspecified_tea(self, state, turn) -> bool:
+        candidates = turn['candidates']
+        return self.config.generic_tea in candidates and not any(self.is_tea(each) for each in candidates)
+
+    def when_not_tea(self, state, turn) -> bool:
+        return turn is None or not turn['candidates'] or not self.is_tea(turn['candidates'][0])
+
+    def when_uncertain(self, state, turn) -> bool:
+        return any(self.bar.match_drink(each)[1] for each in state.pending)
+
+    def when_agreed(self, state, turn) -> bool:
+        return turn is not None and self.bar.is_agreement(' '.join(turn['tokens']))
+
+    def when_nothing_available(self, state, turn) -> bool:
+        return not self.available(state)
+
+    def when_age_unknown(self, state, turn) -> bool:
+        return state.verified_age is None and bool(self.bar.check_alcohol(self.available(state)))
+
+    def when_no_number(self, state, turn) -> bool:
+        return not turn['numbers']
+
+    # actions, each of them returns the next state of the dialog and the sentences of the bot
+
+    def do_ask_repeat(self, state, turn) -> tuple:
+        tracer.count('repeat_prompts')
+        return state, [self.config.repeat]
+
+    def do_say_goodbye(self, state, turn) -> tuple:
+        return state._replace(pending=[]), [self.config.goodbye]
+
+    def do_ask_tea(self, state, turn) -> tuple:
+        pending = [each for each in turn['candidates'] if each != self.config.generic_tea]
+        return state._replace(pending=pending, ordered=time.time(), served=None, case=0), [self.bar.ask_specially]
+
+    def do_take_order(self, state, turn) -> tuple:
+        return state._replace(pending=list(turn['candidates']), ordered=time.time(), served=None, case=0), []
+
+    def do_ask_repeat_question(self, state, turn) -> tuple:
+        tracer.count('repeat_prompts')
+        return state, [self.bar.repeat_question]
+
+    def do_take_tea(self, state, turn) -> tuple:
+        return state._replace(pending=turn['candidates'] + state.pending), []
+
+    def do_ask_confirmation(self, state, turn) -> tuple:
+        candidate = next(each for each in state.pending if self.bar.match_drink(each)[1])
+        name, _ = self.bar.match_drink(candidate)
+        return state._replace(confirming=candidate), [self.templates.confirmation(name)]
+
+    def do_accept_drink(self, state, turn) -> tuple:
+        name, _ = self.bar.match_drink(state.confirming)
+        pending = list(state.pending)
+        pending[pending.index(state.confirming)] = name
+        return state._replace(pending=pending, confirming=None), []
+
+    def do_drop_drink(self, state, turn) -> tuple:
+        pending = list(state.pending)
+        pending.remove(state.confirming)
+        return state._replace(pending=pending, confirming=None), []
+
+    def do_say_not_selling(self, state, turn) -> tuple:
+        return state._replace(pending=[], served=[], case=0), [self.bar.not_selling, self.config.another_order]
+
+    def do_ask_age(self, state, turn) -> tuple:
+        return state, [self.templates.age_question(self.bar.check_alcohol(self.available(state)))]
+
+    def do_ask_age_again_short(self, state, turn) -> tuple:
+        tracer.count('repeat_prompts')
+        return state, [self.bar.repeat_age_short]
+
+    def do_ask_age_again(self, state, turn) -> tuple:
+        tracer.count('repeat_prompts')
+        return state, [self.bar.repeat_age]
+
+    def do_verify_age(self, state, turn) -> tuple:
+        return state._replace(verified_age=turn['numbers'][-1]), []
+
+    def do_serve(self, state, turn) -> tuple:
+        drinks = self.available(state)
+        alcohols = self.bar.check_alcohol(drinks)
+        case = 0
+        if alcohols:
+            drinks, case = self.bar.filter_by_age(drinks, alcohols, state.verified_age)
+        self.bar.record_order(drinks, case, state.session, state.ordered)
+        sentences = [self.templates.answer(drinks, case), self.config.another_order]
+        return state._replace(pending=[], served=drinks, case=case), sentences
+
+    def anticipate(self, state: DialogState) -> list:
+        """
+        Sentences which can follow the next utterance, they can be synthesized while the customer is speaking
+        :param state: state of the dialog
+        :return: list of sentences
+        """
+        if state.state == 'age':
+            drinks = self.available(state)
+            alcohols = self.bar.check_alcohol(drinks)
+            minor_drinks, minor_case = self.bar.filter_by_age(list(drinks), alcohols, 0)
+            return [self.templates.answer(drinks, 1), self.templates.answer(minor_drinks, minor_case),
+                    self.config.another_order]
+        if state.state == 'order':
+            return [self.config.another_order]
+        return []
@@ -0,0 +1,268 @@
+import argparse
+import asyncio
+import json
+import socket
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from bar_settings import Bar
+from menu import Menu
+from fuzzy_menu import FuzzyMenu
+from bar_config import hot_drinks, cold_drinks, tea, alcohol, rejection
+from dialog_machine import DialogMachine, extract_turn, extract_plain_turn
+from order_tickets import TicketSink
+from tracing import tracer
+
+
+worker_nlp = None
+worker_extractor = None
+
+
+def init_worker(cold, hot, tea_kinds, alcoholic, aliases, traced=False):
+    """
+    Loads the model in the worker process and builds the menu of the server from its lists (see Menu)
+    """
+    global worker_nlp, worker_extractor
+    from nlp_settings import NLP
+    from extraction_cache import ParseCache
+    from tiered_extractor import TieredExtractor
+    from bar_config import fillers, patterns
+    worker_nlp = NLP(patterns=patterns, cache=ParseCache())
+    menu = Menu(cold, hot, tea_kinds, alcoholic, aliases)
+    worker_extractor = TieredExtractor(worker_nlp, menu, rejection, fillers, FuzzyMenu(menu))
+    # measurements of the worker are sent to the parent with every extraction, inherited ones are dropped
+    tracer.enabled = traced
+    tracer.take()
+
+
+def extract(text: str) -> dict:
+    """
+    Parses the transcript in the worker process. Only plain data is sent back, so the spaCy objects never leave
+    the worker.
+    :param text: transcript of the customer
+    :return: tuple (dictionary of the extraction (see extract_turn), measurements of the worker (see Tracer.take))
+    """
+    return extract_turn(worker_nlp, worker_extractor.parse(text), text, rejection), tracer.take()
+
+
+class NLPWorkerPool(object):
+    def __init__(self, workers=2, max_pending=64, timeout=5.0):
+        """
+        Shared pool of NLP worker processes. Each worker loads the model once; requests over max_pending wait at
+        most timeout seconds for a free slot. The workers are started by the server with its menu.
+        :param workers: number of worker processes
+        :param max_pending: upper bound of requests in the pool
+        :param timeout: seconds to wait for a free slot
+        """
+        self.workers = workers
+        self.executor = None
+        self.slots = asyncio.Semaphore(max_pending)
+        self.timeout = timeout
+
+    def start(self, menu):
+        """
+        Starts the workers, each of them builds the same menu from its lists
+        :param menu: Menu object of the server
+        :return:
+        """
+        lists = (menu.cold, menu.hot, menu.tea, menu.alcohol, dict(menu.aliases))
+        self.executor = ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=lists + (tracer.enabled,))
+
+    async def extract(self, text: str) -> dict:
+        await asyncio.wait_for(self.slots.acquire(), self.timeout)
+        try:
+            turn, measurements = await asyncio.get_running_loop().run_in_executor(self.executor, extract, text)
+        finally:
+            self.slots.release()
+        tracer.merge(measurements)
+        return turn
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+class DialogServer(object):
+    def __init__(self, pool, menu=None, max_sessions=256, tickets=None):
+        """
+        Local server which runs many dialogs at the same time. Requests and responses are JSON lines over TCP:
+            {"op": "start"}                                   -> {"session": id, "prompts": []}
+            {"op": "say", "session": id, "text": transcript}  -> {"prompts": [...], "done": bool}
+            {"op": "end", "session": id}                      -> {"done": true}
+            {"op": "suspend", "session": id}                  -> {"snapshot": json}
+            {"op": "resume", "snapshot": json}                -> {"session": id, "prompts": []}
+        text is null when the speech was not understood. A suspended session is removed from the server, its
+        snapshot can be resumed by this or another server.
+        Sessions are DialogState tuples stepped by one DialogMachine compiled when the server starts.
+        :param pool: NLPWorkerPool object, it is started with the menu of the server
+        :param menu: Menu object, created from bar_config if not given
+        :param max_sessions: upper bound of concurrent sessions
+        :param tickets: TicketSink object which records the confirmed orders
+        """
+        self.pool = pool
+        menu = menu or Menu(cold_drinks, hot_drinks, tea, alcohol)
+        pool.start(menu)
+        self.machine = DialogMachine(Bar(None, None, menu, FuzzyMenu(menu), tickets=tickets))
+        self.max_sessions = max_sessions
+        self.sessions = {}
+
+    async def dispatch(self, request: dict) -> dict:
+        operation = request.get('op')
+        if operation == 'start':
+            if len(self.sessions) >= self.max_sessions:
+                return {'error': 'too many sessions'}
+            session = self.machine.start(uuid.uuid4().hex)
+            self.sessions[session.session] = session
+            return {'session': session.session, 'prompts': []}
+        if operation == 'resume':
+            if len(self.sessions) >= self.max_sessions:
+                return {'error': 'too many sessions'}
+            try:
+                session = self.machine.resume(request.get('snapshot'))
+            except (TypeError, ValueError):
+                return {'error': 'invalid snapshot'}
+            self.sessions[session.session] = session
+            return {'session': session.session, 'prompts': []}
+
+        session = self.sessions.get(request.get('session'))
+        if session is None:
+            return {'error': 'unknown session'}
+        if operation == 'end':
+            del self.sessions[session.session]
+            return {'done': True}
+        if operation == 'suspend':
+            del self.sessions[session.session]
+            return {'snapshot': self.machine.snapshot(session)}
+        if operation == 'say':
+            tracer.start_session(session.session)
+            text = request.get('text')
+            try:
+                with tracer.span('extract'):
+                    if text and not self.machine.needs_parse(session):
+                        extraction = extract_plain_turn(text, self.machine.number_words)
+                    else:
+                        extraction = await self.pool.extract(text) if text else None
+            except asyncio.TimeoutError:
+                tracer.count('busy_rejections')
+                return {'error': 'busy'}
+            # the session may have been suspended or ended while its transcript was parsed
+            if self.sessions.get(session.session) is not session:
+                return {'error': 'unknown session'}
+            session, prompts = self.machine.step(session, extraction)
+            done = self.machine.is_done(session)
+            if done:
+                del self.sessions[session.session]
+            else:
+                self.sessions[session.session] = session
+            return {'prompts': prompts, 'done': done}
+        return {'error': 'unknown operation'}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = await self.dispatch(json.loads(line))
+                except ValueError:
+                    response = {'error': 'invalid request'}
+                writer.write((json.dumps(response) + '\n').encode('utf-8'))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+class DialogClient(object):
+    def __init__(self, host='127.0.0.1', port=8765):
+        """
+        Local client of the dialog server, it plays the role of a station in tests
+        """
+        self.connection = socket.create_connection((host, port))
+        self.stream = self.connection.makefile('rw', encoding='utf-8')
+        self.session = None
+
+    def request(self, request: dict) -> dict:
+        self.stream.write(json.dumps(request) + '\n')
+        self.stream.flush()
+        return json.loads(self.stream.readline())
+
+    def start(self) -> dict:
+        response = self.request({'op': 'start'})
+        self.session = response.get('session')
+        return response
+
+    def say(self, text) -> dict:
+        return self.request({'op': 'say', 'session': self.session, 'text': text})
+
+    def end(self) -> dict:
+        return self.request({'op': 'end', 'session': self.session})
+
+    def suspend(self) -> str:
+        """
+        :return: snapshot of the session, it can be resumed by any server
+        """
+        snapshot = self.request({'op': 'suspend', 'session': self.session}).get('snapshot')
+        self.session = None
+        return snapshot
+
+    def resume(self, snapshot: str) -> dict:
+        response = self.request({'op': 'resume', 'snapshot': snapshot})
+        self.session = response.get('session')
+        return response
+
+    def run_script(self, utterances) -> list:
+        """
+        Replays the utterances of one customer
+        :param utterances: list of transcripts
+        :return: list of (transcript, sentences of the bot)
+        """
+        self.start()
+        dialog = []
+        for text in utterances:
+            response = self.say(text)
+            dialog.append((text, response.get('prompts', [])))
+            if response.get('done'):
+                break
+        return dialog
+
+    def close(self):
+        self.stream.close()
+        self.connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-station dialog server of the bar')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--max-pending', type=int, default=64)
+    parser.add_argument('--tickets', help='SQLite database of the confirmed orders, they are not recorded if not given')
+    parser.add_argument('--metrics-port', type=int, help='port of the Prometheus scrape endpoint, none if not given')
+    arguments = parser.parse_args()
+    if arguments.metrics_port:
+        tracer.serve(arguments.metrics_port)
+
+    async def run():
+        pool = NLPWorkerPool(arguments.workers, arguments.max_pending)
+        tickets = None
+        if arguments.tickets:
+            tickets = TicketSink(arguments.tickets)
+            tickets.start()
+        try:
+            await DialogServer(pool, tickets=tickets).serve(arguments.host, arguments.port)
+        finally:
+            pool.close()
+            if tickets is not None:
+                tickets.close()
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import os
+from collections import OrderedDict
+
+
+class ParseCache(object):
+    def __init__(self, max_entries=2048, path=None):
+        """
+        Bounded LRU cache of parsed transcripts keyed by the normalized text. Extractions are stored in the user data
+        of the Doc, so a cached Doc brings its drinks and rejection flags with it. The cache can be persisted as
+        a spaCy DocBin, then a restarted station starts warm.
+        :param max_entries: upper bound of cached transcripts
+        :param path: file of the persisted cache, None means the cache lives only in memory
+        """
+        self.max_entries = max_entries
+        self.path = path
+        self.docs = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return ' '.join(text.lower().split())
+
+    def parse(self, pipeline, text: str) -> object:
+        """
+        :param pipeline: spaCy pipeline which parses the transcript on a miss
+        :param text: transcript of the customer
+        :return: parsed transcript
+        """
+        key = self.normalize(text)
+        order_doc = self.docs.get(key)
+        if order_doc is not None:
+            self.docs.move_to_end(key)
+            self.hits += 1
+            return order_doc
+        self.misses += 1
+        order_doc = pipeline(key)
+        self.store(key, order_doc)
+        return order_doc
+
+    def store(self, key: str, order_doc):
+        """
+        Adds the Doc which was parsed outside of the cache (e.g., by nlp.pipe)
+        :param key: normalized transcript
+        :param order_doc: parsed transcript
+        :return:
+        """
+        self.docs[key] = order_doc
+        while len(self.docs) > self.max_entries:
+            self.docs.popitem(last=False)
+
+    def save(self):
+        if self.path is None:
+            return
+        from spacy.tokens import DocBin
+        doc_bin = DocBin(store_user_data=True)
+        for order_doc in self.docs.values():
+            doc_bin.add(order_doc)
+        temporary = self.path + '.tmp'
+        with open(temporary, 'wb') as cache_file:
+            cache_file.write(doc_bin.to_bytes())
+        os.replace(temporary, self.path)
+
+    def load(self, vocab):
+        """
+        Reads the persisted cache, least recently used transcripts come first
+        :param vocab: vocabulary of the pipeline
+        :return:
+        """
+        if self.path is None or not os.path.exists(self.path):
+            return
+        from spacy.tokens import DocBin
+        with open(self.path, 'rb') as cache_file:
+            doc_bin = DocBin(store_user_data=True).from_bytes(cache_file.read())
+        for order_doc in doc_bin.get_docs(vocab):
+            self.store(order_doc.text, order_doc)
@@ -0,0 +1,128 @@
+import re
+from collections import Counter
+
+
+def levenshtein(first: str, second: str) -> int:
+    """
+    Edit distance of two strings
+    """
+    if len(first) < len(second):
+        first, second = second, first
+    previous = list(range(len(second) + 1))
+    for row, first_char in enumerate(first, 1):
+        current = [row]
+        for column, second_char in enumerate(second, 1):
+            current.append(min(previous[column] + 1, current[column - 1] + 1,
+                               previous[column - 1] + (first_char != second_char)))
+        previous = current
+    return previous[-1]
+
+
+def phonetic_key(phrase: str) -> str:
+    """
+    Rough phonetic code of the phrase: similar sounding consonants are merged, vowels after the first letter and
+    repeated letters are dropped. For example 'rum' and 'rom', 'jager' and 'jaeger' get the same code.
+    :param phrase: name of the beverage or word from the transcript
+    :return: phonetic code
+    """
+    codes = []
+    for word in phrase.lower().split():
+        word = re.sub('[^a-z]', '', word)
+        word = word.replace('ph', 'f').replace('ck', 'k').replace('x', 'ks')
+        word = word.replace('c', 'k').replace('q', 'k').replace('z', 's')
+        if not word:
+            continue
+        code = word[0]
+        for char in word[1:]:
+            if char in 'aeiouyhw' or char == code[-1]:
+                continue
+            code += char
+        codes.append(code)
+    return ' '.join(codes)
+
+
+def ngrams(word: str, size: int = 3) -> set:
+    """
+    :return: set of character n-grams of the word, padded with spaces so the edges count as well
+    """
+    padded = ' ' + word + ' '
+    return {padded[index:index + size] for index in range(len(padded) - size + 1)}
+
+
+class FuzzyMenu(object):
+    def __init__(self, menu, accept=0.8, confirm=0.6, candidates=8, min_length=5, phonetic_bonus=0.1):
+        """
+        Precomputed fuzzy and phonetic index over the names and aliases of the menu. Phrases sharing trigrams with
+        the word are found by an inverted index, so only a few of them are compared by edit distance however large
+        the menu is. Matches of short words (e.g., 'late' for 'latte') and of alcoholic beverages (e.g., 'room' for
+        'rom') are always confirmed by the customer.
+        :param menu: Menu object
+        :param accept: confidence from which the match is taken without confirmation
+        :param confirm: confidence from which the match is confirmed by the customer, lower ones are rejected
+        :param candidates: number of phrases with most common trigrams which are compared by edit distance
+        :param min_length: length of the shortest word which is matched without confirmation
+        :param phonetic_bonus: confidence added to the phrases which sound the same as the word
+        """
+        self.menu = menu
+        self.accept = accept
+        self.confirm = confirm
+        self.candidates = candidates
+        self.min_length = min_length
+        self.phonetic_bonus = phonetic_bonus
+        self.phonetic = {}
+        self.grams = {}
+        for phrase in list(menu.items) + list(menu.aliases):
+            self.phonetic.setdefault(phonetic_key(phrase), []).append(phrase)
+            for gram in ngrams(phrase):
+                self.grams.setdefault(gram, []).append(phrase)
+        self.matches = {}
+        self.max_matches = 4096
+
+    def match(self, candidate) -> tuple:
+        """
+        Finds the closest item of the menu
+        :param candidate: possible drink (string or spaCy object)
+        :return: tuple (name of the beverage in the menu, confidence between 0 and 1), (None, 0.0) if nothing is close
+        """
+        word = self.menu.normalize(candidate)
+        name = self.menu.lookup(word)
+        if name is not None:
+            return name, 1.0
+        if len(word) < 3:
+            return None, 0.0
+        if word in self.matches:
+            return self.matches[word]
+
+        best, confidence = None, 0.0
+        for phrase in self.phonetic.get(phonetic_key(word), []):
+            score = min(self.similarity(word, phrase) + self.phonetic_bonus, 0.99)
+            if score > confidence:
+                best, confidence = phrase, score
+        # one edit away with the same sound cannot be beaten by the n-gram candidates
+        if best is None or levenshtein(word, best) > 1:
+            shared = Counter()
+            for gram in ngrams(word):
+                shared.update(self.grams.get(gram, ()))
+            for phrase, _ in shared.most_common(self.candidates):
+                score = self.similarity(word, phrase)
+                if score > confidence:
+                    best, confidence = phrase, score
+
+        if best is None or confidence < self.confirm:
+            match = (None, 0.0)
+        else:
+            name = self.menu.lookup(best)
+            if len(word) < self.min_length or self.menu.is_alcoholic(name):
+                confidence = min(confidence, (self.accept + self.confirm) / 2)
+            match = (name, confidence)
+        if len(self.matches) >= self.max_matches:
+            self.matches.clear()
+        self.matches[word] = match
+        return match
+
+    @staticmethod
+    def similarity(word: str, phrase: str) -> float:
+        """
+        :return: 1 minus the edit distance relative to the length of the longer string
+        """
+        return 1.0 - float(levenshtein(word, phrase)) / max(len(word), len(phrase))
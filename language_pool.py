@@ -0,0 +1,107 @@
+import gc
+import importlib
+import threading
+import time
+from collections import OrderedDict
+
+from model_registry import resident_memory
+
+
+def language_config(language: str) -> object:
+    """
+    :param language: language code (e.g., 'en', 'de')
+    :return: configuration module of the language, bar_config for English
+    """
+    if language == 'en':
+        return importlib.import_module('bar_config')
+    return importlib.import_module('bar_config_' + language)
+
+
+class LanguagePool(object):
+    def __init__(self, loader, unloader=None, budget=None, max_languages=None):
+        """
+        Languages are loaded when the first customer speaks them and kept while they fit in the memory budget.
+        The least recently used language is evicted first, the language which is just requested is never evicted.
+        :param loader: function which loads the resources of the language (model, menu, prompts), it gets the
+                       language code
+        :param unloader: function which releases the resources of the evicted language, it gets the language code
+                         and the resources
+        :param budget: upper bound of the memory of the loaded languages in bytes, None means no bound
+        :param max_languages: upper bound of the number of loaded languages, None means no bound
+        """
+        self.loader = loader
+        self.unloader = unloader
+        self.budget = budget
+        self.max_languages = max_languages
+        self.languages = OrderedDict()
+        self.statistics = {}
+        self.lock = threading.RLock()
+
+    def get(self, language: str) -> object:
+        """
+        :param language: language code
+        :return: resources of the language, loaded if they are not in the pool
+        """
+        with self.lock:
+            if language in self.languages:
+                self.languages.move_to_end(language)
+                self.statistics[language]['uses'] += 1
+                return self.languages[language]
+            statistics = self.statistics.setdefault(language, {'loads': 0, 'evictions': 0, 'uses': 0})
+            memory_before = resident_memory()
+            start = time.perf_counter()
+            self.languages[language] = self.loader(language)
+            statistics.update({'load_time': time.perf_counter() - start,
+                               'memory': max(resident_memory() - memory_before, 0)})
+            statistics['loads'] += 1
+            statistics['uses'] += 1
+            self.evict()
+            return self.languages[language]
+
+    def footprint(self) -> int:
+        """
+        :return: memory of the loaded languages in bytes, as measured when they were loaded
+        """
+        return sum(self.statistics[language]['memory'] for language in self.languages)
+
+    def over_budget(self) -> bool:
+        if self.max_languages is not None and len(self.languages) > self.max_languages:
+            return True
+        return self.budget is not None and self.footprint() > self.budget
+
+    def evict(self):
+        """
+        Evicts the least recently used languages until the rest fits in the budget
+        :return:
+        """
+        with self.lock:
+            while len(self.languages) > 1 and self.over_budget():
+                self.release(next(iter(self.languages)))
+
+    def release(self, language: str):
+        with self.lock:
+            resources = self.languages.pop(language)
+            if self.unloader is not None:
+                self.unloader(language, resources)
+            self.statistics[language]['evictions'] += 1
+        del resources
+        gc.collect()
+
+    def __contains__(self, language) -> bool:
+        return language in self.languages
+
+    def loaded(self) -> list:
+        """
+        :return: loaded language codes, the least recently used one first
+        """
+        return list(self.languages)
+
+    def report(self) -> dict:
+        """
+        :return: dictionary of the languages which were ever loaded. Keys: language codes, Values: load time
+                 (seconds) and memory (bytes) of the last load, number of loads, evictions and uses, flag whether the
+                 language is loaded now
+        """
+        with self.lock:
+            return {language: dict(values, loaded=language in self.languages)
+                    for (language, values) in self.statistics.items()}
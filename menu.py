@@ -0,0 +1,139 @@
+from collections import namedtuple
+
+
+MenuItem = namedtuple('MenuItem', ['name', 'category', 'alcoholic', 'tea'])
+
+
+class Menu(object):
+    def __init__(self, cold: list, hot: list, tea=(), alcohol=(), aliases=None):
+        """
+        Menu of the bar which is built once and answers all lookups with hashing.
+        :param cold: list of cold beverages
+        :param hot: list of hot beverages
+        :param tea: list of types of tea in the menu
+        :param alcohol: list of alcoholic beverages in the menu
+        :param aliases: other names of the beverages. Keys: alias, Values: name in the menu
+        """
+        self.items = {}
+        self.aliases = {}
+        self.phrases = {}
+        self.longest_phrase = {}
+        tea = set(tea)
+        alcohol = set(alcohol)
+        for each_drink in hot:
+            self.add_item(each_drink, 'hot', each_drink in alcohol, each_drink in tea)
+        for each_drink in cold:
+            self.add_item(each_drink, 'cold', each_drink in alcohol, each_drink in tea)
+        for alias, name in (aliases or {}).items():
+            self.add_alias(alias, name)
+
+    @staticmethod
+    def normalize(name) -> str:
+        return ' '.join(str(name).lower().split())
+
+    def add_phrase(self, phrase: str, name: str):
+        words = tuple(phrase.split())
+        self.phrases[words] = name
+        self.longest_phrase[words[0]] = max(self.longest_phrase.get(words[0], 0), len(words))
+
+    def add_item(self, name: str, category: str, alcoholic=False, tea=False):
+        """
+        Adds the beverage to the menu
+        :param name: name of the beverage
+        :param category: 'hot' or 'cold'
+        :param alcoholic: flag whether the beverage is alcoholic or not
+        :param tea: flag whether the beverage is a kind of tea or not
+        :return:
+        """
+        name = self.normalize(name)
+        self.items[name] = MenuItem(name, category, bool(alcoholic), bool(tea))
+        self.add_phrase(name, name)
+
+    def add_alias(self, alias: str, name: str):
+        """
+        Adds another name for the beverage in the menu
+        :param alias: other name of the beverage (e.g., rum)
+        :param name: name of the beverage in the menu (e.g., rom)
+        :return:
+        """
+        alias = self.normalize(alias)
+        name = self.normalize(name)
+        if name not in self.items:
+            raise KeyError("'{0}' is not in the menu".format(name))
+        self.aliases[alias] = name
+        self.add_phrase(alias, name)
+
+    def lookup(self, name) -> object:
+        """
+        :param name: possible drink (string or spaCy object)
+        :return: name of the beverage in the menu, None if it is not in the menu
+        """
+        name = self.normalize(name)
+        if name in self.items:
+            return name
+        return self.aliases.get(name)
+
+    def __contains__(self, name) -> bool:
+        return self.lookup(name) is not None
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def item(self, name) -> object:
+        name = self.lookup(name)
+        return self.items[name] if name is not None else None
+
+    def is_alcoholic(self, name) -> bool:
+        item = self.item(name)
+        return item is not None and item.alcoholic
+
+    def is_tea(self, name) -> bool:
+        item = self.item(name)
+        return item is not None and item.tea
+
+    def category(self, category: str) -> list:
+        """
+        :param category: 'hot' or 'cold'
+        :return: list of beverages of the category in the order they were added
+        """
+        return [name for (name, item) in self.items.items() if item.category == category]
+
+    @property
+    def hot(self) -> list:
+        return self.category('hot')
+
+    @property
+    def cold(self) -> list:
+        return self.category('cold')
+
+    @property
+    def alcohol(self) -> list:
+        return [name for (name, item) in self.items.items() if item.alcoholic]
+
+    @property
+    def tea(self) -> list:
+        return [name for (name, item) in self.items.items() if item.tea]
+
+    def match_tokens(self, tokens: list) -> list:
+        """
+        Finds the beverages in the sequence of tokens. At every position the longest phrase of the menu wins, so
+        'green tea' is found rather than a shorter item.
+        :param tokens: list of tokens in the string format
+        :return: list of tuples (start index, end index, name of the beverage in the menu)
+        """
+        words = [str(each).lower() for each in tokens]
+        found = []
+        position = 0
+        while position < len(words):
+            match = None
+            for length in range(min(self.longest_phrase.get(words[position], 0), len(words) - position), 0, -1):
+                name = self.phrases.get(tuple(words[position:position + length]))
+                if name is not None:
+                    match = (position, position + length, name)
+                    break
+            if match is None:
+                position += 1
+            else:
+                found.append(match)
+                position = match[1]
+        return found
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+
+from tracing import tracer
+
+
+def resident_memory() -> int:
+    """
+    Reads the resident memory of the current process
+    :return: resident set size in bytes, 0 if it cannot be read on this platform
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, AttributeError):
+        return 0
+
+
+class Pipeline(object):
+    def __init__(self, model, disable=()):
+        """
+        View of the shared spaCy model which runs only the requested components. Tokenizer and vocabulary are the
+        ones of the shared model, so the views do not hold any copy of it.
+        :param model: loaded spaCy language object
+        :param disable: names of pipeline components which are skipped by this view
+        """
+        self.model = model
+        self.disable = [name for name in disable if name in model.pipe_names]
+
+    def __call__(self, text):
+        with tracer.span('parse'):
+            return self.model(text, disable=self.disable)
+
+    def pipe(self, texts, **kwargs):
+        return self.model.pipe(texts, disable=self.disable, **kwargs)
+
+    def __getattr__(self, item):
+        return getattr(self.model, item)
+
+
+class ModelRegistry(object):
+    # components other components depend on, they are never disabled (spaCy v3 names)
+    shared_components = ('tok2vec', 'attribute_ruler')
+
+    def __init__(self):
+        """
+        Process-wide registry of spaCy models. Each model is loaded on first use and shared by every caller.
+        """
+        self.models = {}
+        self.statistics = {}
+        self.lock = threading.Lock()
+
+    def load(self, name: str) -> object:
+        """
+        Loads the model once and keeps the loading time and the resident memory it took
+        :param name: name of the spaCy model (e.g., en_core_web_sm)
+        :return: loaded spaCy language object
+        """
+        with self.lock:
+            if name not in self.models:
+                import spacy
+                memory_before = resident_memory()
+                start = time.perf_counter()
+                self.models[name] = spacy.load(name)
+                self.statistics[name] = {'load_time': time.perf_counter() - start,
+                                         'memory': max(resident_memory() - memory_before, 0),
+                                         'components': list(self.models[name].pipe_names)}
+            return self.models[name]
+
+    def unload(self, name: str):
+        """
+        Drops the model from the registry. Its memory is freed when the last pipeline view of it is dropped as well.
+        :param name: name of the spaCy model
+        :return:
+        """
+        with self.lock:
+            self.models.pop(name, None)
+            self.statistics.pop(name, None)
+
+    def pipeline(self, name: str, components=None) -> Pipeline:
+        """
+        Returns the view of the shared model with only the requested components.
+        :param name: name of the spaCy model
+        :param components: list of components the caller needs (e.g., ['tagger'] or ['tagger', 'parser']),
+                           None means the full pipeline
+        :return: pipeline view
+        """
+        model = self.load(name)
+        if components is None:
+            return Pipeline(model)
+        disable = [each for each in model.pipe_names
+                   if each not in components and each not in self.shared_components]
+        return Pipeline(model, disable)
+
+    def report(self) -> dict:
+        """
+        :return: dictionary of loaded models. Keys: model names, Values: load time (seconds), resident memory
+                 (bytes) and names of components
+        """
+        return {name: dict(values) for (name, values) in self.statistics.items()}
+
+
+registry = ModelRegistry()
+
+
+def get_pipeline(name: str = 'en_core_web_sm', components=None) -> Pipeline:
+    return registry.pipeline(name, components)
@@ -1,16 +1,45 @@
 from nltk import Tree
-import spacy
+from model_registry import get_pipeline
 from spacy.symbols import NOUN, PROPN
 from spacy.matcher import Matcher
+from tracing import tracer
 
 
 class NLP(object):
-    def __init__(self):
-        self.tokenizer = spacy.load("en_core_web_sm")
+    def __init__(self, patterns=None, cache=None, model='en_core_web_sm', components=('tagger', 'parser')):
+        """
+        :param patterns: additional combination patterns (e.g., from config). Keys: combination types,
+                         Values: spaCy matcher patterns
+        :param cache: ParseCache object for repeated transcripts
+        :param model: name of the spaCy model of the language
+        :param components: components of the model which assign the part of speech and the dependencies
+        """
+        self.cache = cache
+        self.model = model
+        self.components = list(components)
+        self.tokenizer = get_pipeline(model, components=self.components)
         self.matcher = Matcher(self.tokenizer.vocab)
         self.patterns = {'Double_Nouns': [{'POS': 'NOUN'}, {'POS': 'NOUN'}],
                          'Adjective_Noun': [{'POS': 'ADJ'}, {'POS': 'NOUN'}],
                          'Double_Pronouns': [{'POS': 'PROPN'}, {'POS': 'PROPN'}]}
+        self.patterns.update(patterns or {})
+        self.labels = {}
+        for type_combination, pattern in self.patterns.items():
+            self.compile_pattern(type_combination, pattern)
+
+    def compile_pattern(self, type_combination: str, pattern: list):
+        """
+        Registers the pattern in the matcher. Patterns are registered once, so matching the order does not
+        rebuild the matcher.
+        :param type_combination: type of double combinations in terms of POS (e.g., Double Nouns, Adjective Noun)
+        :param pattern: spaCy matcher pattern
+        :return:
+        """
+        if type_combination in self.labels:
+            self.matcher.remove(type_combination)
+        self.matcher.add(type_combination, None, pattern)
+        self.patterns[type_combination] = pattern
+        self.labels[type_combination] = self.tokenizer.vocab.strings[type_combination]
 
     @staticmethod
     def tok_format(token_node: object) -> object:
@@ -42,6 +71,15 @@ class NLP(object):
         else:
             return self.tok_format(node)
 
+    def match_combinations(self, order_doc: object) -> set:
+        """
+        The method runs all patterns over the order sentence in one pass of the matcher
+        :param order_doc:
+        :return: set of labelled combinations (type of combination, combination)
+        """
+        return {(self.tokenizer.vocab.strings[match_id], order_doc[start:end].text)
+                for (match_id, start, end) in self.matcher(order_doc)}
+
     def extract_combinations(self, order_doc: object, type_combination: str) -> list:
         """
         The method extracts double combinations with respect to the given combination type through the order sentence
@@ -49,13 +87,11 @@ class NLP(object):
         :param type_combination: type of double combinations in terms of POS (e.g., Double Nouns, Adjective Noun)
         :return: extracted combination according to the given type combination
         """
-        pattern = self.patterns[type_combination]
-        self.matcher.add(type_combination, None, pattern)
-        matches = self.matcher(order_doc)
-        combinations = [order_doc[start:end].text for (_, start, end) in matches]
-        return combinations
+        return [combination for (label, combination) in self.match_combinations(order_doc)
+                if label == type_combination]
 
     @staticmethod
+    @tracer.timed('collect_pos')
     def collect_pos(order_doc: object) -> dict:
         """
         Method is used to collect nouns and proper nouns from the given order sentence.
@@ -69,23 +105,62 @@ class NLP(object):
 
         return collection
 
+    @tracer.timed('match')
     def collect_compounds(self, order_doc: object) -> list:
         """
         Method is used to collect all relevant data from the order that will be used to check the given order
         :param order_doc:
         :return: list of all possible identical combinations from the given order sentence
         """
-
         all_combinations = []
-        for each in self.patterns.keys():
-            temporary = []
-            temporary += self.extract_combinations(order_doc, each)
-            for drink in temporary:
-                if drink not in all_combinations:
-                    all_combinations.append(drink)
+        seen = set()
+        for (_, start, end) in self.matcher(order_doc):
+            drink = order_doc[start:end].text
+            if drink not in seen:
+                seen.add(drink)
+                all_combinations.append(drink)
 
         return all_combinations
 
+    def parse(self, text: str) -> object:
+        """
+        Parses the transcript of the customer. Repeated transcripts are taken from the cache if it is set.
+        :param text: transcript of the customer
+        :return: parsed transcript
+        """
+        if self.cache is None:
+            return self.tokenizer(text.lower())
+        return self.cache.parse(self.tokenizer, text)
+
+    def extract_drinks(self, order_doc: object) -> list:
+        """
+        Collects all possible drinks (combinations, nouns and proper nouns) of the sentence. The result is kept in
+        the Doc, so the extraction runs once per sentence however many times it is asked.
+        :param order_doc:
+        :return: list of possible drinks in the string format
+        """
+        drinks = order_doc.user_data.get('drinks')
+        if drinks is None:
+            collection = self.collect_pos(order_doc)
+            drinks = self.collect_compounds(order_doc) + [str(each) for each in collection['nouns']] + \
+                [str(each) for each in collection['propernouns']]
+            order_doc.user_data['drinks'] = drinks
+        return list(drinks)
+
+    def is_rejection(self, order_doc: object, rejection: list) -> bool:
+        """
+        Checks whether the sentence contains one of the rejections. The flag is kept in the Doc.
+        :param order_doc:
+        :param rejection: list of possible 'kind' rejections of ordering something
+        :return: flag whether the customer rejects ordering something
+        """
+        key = 'rejected:' + '|'.join(rejection)
+        rejected = order_doc.user_data.get(key)
+        if rejected is None:
+            rejected = any(each in rejection for each in self.list_of_tokens(order_doc))
+            order_doc.user_data[key] = rejected
+        return rejected
+
     @staticmethod
     def list_of_tokens(doc: object) -> list:
         """
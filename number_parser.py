@@ -0,0 +1,105 @@
+import re
+
+import bar_config
+
+words_pattern = re.compile(r"\d+|[^\W\d_]+")
+
+
+class NumberWords(object):
+    def __init__(self, units: dict, tens: dict, hundred: str, conjunction: str, units_first=False):
+        """
+        Spelled-out numbers of one language (see number_words in bar_config)
+        :param units: words of the numbers below twenty. Keys: words, Values: numbers
+        :param tens: words of the tens. Keys: words, Values: numbers
+        :param hundred: word of hundred
+        :param conjunction: word which joins the parts of the number (e.g., 'and', 'und')
+        :param units_first: flag whether the unit comes before the tens (e.g., German 'einundzwanzig')
+        """
+        self.units = units
+        self.tens = tens
+        self.hundred = hundred
+        self.conjunction = conjunction
+        self.units_first = units_first
+        # longest words first, so 'neunzehn' is not split into 'neun' and the rest
+        self.vocabulary = sorted(set(units) | set(tens) | {hundred, conjunction}, key=len, reverse=True)
+
+    def split(self, word: str) -> object:
+        """
+        Splits the word which is written together from number words (e.g., 'einundzwanzig', 'twentyfive')
+        :return: list of number words, None if the word is not made of them
+        """
+        if not word:
+            return []
+        for each in self.vocabulary:
+            if word.startswith(each):
+                rest = self.split(word[len(each):])
+                if rest is not None:
+                    return [each] + rest
+        return None
+
+    def tokenize(self, text: str) -> list:
+        """
+        :return: list of words and digits of the sentence, number words in the order tens, units
+        """
+        words = []
+        for word in words_pattern.findall(text.lower()):
+            parts = None if word.isdigit() or word in self.units or word in self.tens else self.split(word)
+            words += parts or [word]
+        if self.units_first:
+            index = 0
+            while index + 2 < len(words):
+                if words[index] in self.units and self.units[words[index]] < 10 and \
+                        words[index + 1] == self.conjunction and words[index + 2] in self.tens:
+                    words[index:index + 3] = [words[index + 2], words[index]]
+                index += 1
+        return words
+
+
+english = NumberWords(**bar_config.number_words)
+
+
+def extract_numbers(text: str, number_words: NumberWords = english) -> list:
+    """
+    Extracts the numbers from the sentence without any language model. Both digits and spelled-out numbers are
+    recognized (e.g., '25', 'twenty one', 'twenty-five', 'a hundred and two').
+    :param text: sentence (e.g., answer of the customer)
+    :param number_words: spelled-out numbers of the language of the sentence
+    :return: list of numbers in the order they appear
+    """
+    units, tens = number_words.units, number_words.tens
+    numbers = []
+    current = None
+    for word in number_words.tokenize(text):
+        if word.isdigit():
+            if current is not None:
+                numbers.append(current)
+                current = None
+            numbers.append(int(word))
+        elif word in units:
+            if current is not None and current % 10 == 0 and current % 100 != 0 and units[word] < 10:
+                current += units[word]
+            elif current is not None and current % 100 == 0 and current > 0:
+                current += units[word]
+            else:
+                if current is not None:
+                    numbers.append(current)
+                current = units[word]
+        elif word in tens:
+            if current is not None and current % 100 == 0 and current > 0:
+                current += tens[word]
+            else:
+                if current is not None:
+                    numbers.append(current)
+                current = tens[word]
+        elif word == number_words.hundred and current is not None:
+            current *= 100
+        elif word == number_words.hundred:
+            current = 100
+        elif word == number_words.conjunction and current is not None and current % 100 == 0:
+            continue
+        elif current is not None:
+            numbers.append(current)
+            current = None
+    if current is not None:
+        numbers.append(current)
+    return numbers
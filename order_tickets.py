@@ -0,0 +1,224 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from tracing import tracer
+
+
+OrderTicket = namedtuple('OrderTicket', ['ticket_id', 'session', 'drinks', 'case', 'language', 'ordered', 'confirmed'])
+
+
+def new_ticket(drinks, case, session=None, language='en', ordered=None) -> OrderTicket:
+    """
+    :param drinks: names of the served beverages
+    :param case: case of the age check (see Bar.answer_to_the_order)
+    :param session: identifier of the dialog, trace id of the current session if None
+    :param language: language of the customer
+    :param ordered: time when the order was heard, now if None
+    :return: ticket of the confirmed order
+    """
+    confirmed = time.time()
+    return OrderTicket(uuid.uuid4().hex, session or tracer.trace_id.get(), [str(each) for each in drinks], case,
+                       language, ordered or confirmed, confirmed)
+
+
+class TicketSink(object):
+    schema = ('CREATE TABLE IF NOT EXISTS tickets (ticket_id TEXT PRIMARY KEY, session TEXT, drinks TEXT, '
+              'age_case INTEGER, language TEXT, ordered REAL, confirmed REAL)',
+              'CREATE TABLE IF NOT EXISTS ticket_drinks (ticket_id TEXT, drink TEXT, confirmed REAL)',
+              'CREATE INDEX IF NOT EXISTS ticket_drinks_by_time ON ticket_drinks (confirmed, drink)')
+
+    def __init__(self, path: str, batch_size=64, flush_interval=0.2, max_pending=1024):
+        """
+        Records the confirmed orders without blocking the dialog. Tickets are appended to a journal and put in a
+        queue, the writer thread commits them to SQLite in batches (one transaction per batch). The journal is
+        emptied when everything in it is committed, so tickets of a crashed process are committed at the next start.
+        If the queue is full the tickets stay only in the journal. The writer moves that journal aside and commits
+        it from there, submit only waits for the file operations and never for the database.
+        :param path: path of the SQLite database, the journal is path + '.journal'
+        :param batch_size: upper bound of tickets in one transaction
+        :param flush_interval: seconds the writer waits to fill a batch
+        :param max_pending: upper bound of tickets in the queue
+        """
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.rotated_path = self.journal_path + '.replay'
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(max_pending)
+        self.lock = threading.Lock()
+        self.overflow = False
+        self.statistics = {'submitted': 0, 'committed': 0, 'batches': 0, 'overflows': 0, 'recovered': 0}
+        self.closed = threading.Event()
+        self.connection = None
+        self.journal = None
+        self.writer = None
+
+    def start(self):
+        """
+        Creates the database, commits the tickets left in the journal and starts the writer
+        :return:
+        """
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        for statement in self.schema:
+            self.connection.execute(statement)
+        self.connection.commit()
+        for journal_path in (self.rotated_path, self.journal_path):
+            self.statistics['recovered'] += self.replay_journal(journal_path)
+        if os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
+        self.journal = open(self.journal_path, 'a', encoding='utf-8')
+        self.writer = threading.Thread(target=self.run_writer, name='ticket-writer', daemon=True)
+        self.writer.start()
+
+    def submit(self, ticket: OrderTicket) -> bool:
+        """
+        Hands the ticket over to the writer, it never waits for the database
+        :param ticket: ticket of the confirmed order
+        :return: flag whether the ticket is in the queue, False means it waits in the journal
+        """
+        with self.lock:
+            self.journal.write(json.dumps(ticket._asdict()) + '\n')
+            self.journal.flush()
+            self.statistics['submitted'] += 1
+            try:
+                self.queue.put_nowait(ticket)
+                return True
+            except queue.Full:
+                self.overflow = True
+                self.statistics['overflows'] += 1
+                tracer.count('ticket_overflows')
+                return False
+
+    def run_writer(self):
+        while not (self.closed.is_set() and self.queue.empty()):
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while batch and len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            if batch:
+                with tracer.span('ticket_commit'):
+                    self.commit(batch)
+                for _ in batch:
+                    self.queue.task_done()
+            self.truncate_journal()
+
+    def commit(self, tickets) -> int:
+        """
+        Writes the tickets in one transaction. Tickets which are already in the database are skipped.
+        :param tickets: list of tickets
+        :return: number of new tickets
+        """
+        committed = 0
+        with self.connection:
+            for ticket in tickets:
+                cursor = self.connection.execute('INSERT OR IGNORE INTO tickets VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                                 (ticket.ticket_id, ticket.session, json.dumps(ticket.drinks),
+                                                  ticket.case, ticket.language, ticket.ordered, ticket.confirmed))
+                if cursor.rowcount:
+                    committed += 1
+                    self.connection.executemany('INSERT INTO ticket_drinks VALUES (?, ?, ?)',
+                                                [(ticket.ticket_id, drink, ticket.confirmed)
+                                                 for drink in ticket.drinks])
+        self.statistics['committed'] += committed
+        self.statistics['batches'] += 1
+        return committed
+
+    def replay_journal(self, journal_path=None) -> int:
+        """
+        Commits the tickets of the journal which are not in the database yet
+        :param journal_path: path of the journal, the current journal if None
+        :return: number of new tickets
+        """
+        journal_path = journal_path or self.journal_path
+        if not os.path.exists(journal_path):
+            return 0
+        tickets = []
+        with open(journal_path, encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    tickets.append(OrderTicket(**json.loads(line)))
+                except (ValueError, TypeError):
+                    # last line of a crashed process can be cut
+                    continue
+        committed = 0
+        for start in range(0, len(tickets), self.batch_size):
+            committed += self.commit(tickets[start:start + self.batch_size])
+        return committed
+
+    def truncate_journal(self):
+        """
+        Empties the journal when every ticket in it is committed. After an overflow the journal is moved aside and
+        a new one is opened under the lock, its tickets are committed without holding the lock.
+        :return:
+        """
+        with self.lock:
+            if not self.queue.empty():
+                return
+            overflow, self.overflow = self.overflow, False
+            if overflow:
+                self.journal.close()
+                os.replace(self.journal_path, self.rotated_path)
+                self.journal = open(self.journal_path, 'a', encoding='utf-8')
+            elif self.journal.tell() > 0:
+                self.journal.truncate(0)
+                self.journal.seek(0)
+        if overflow:
+            self.replay_journal(self.rotated_path)
+            os.remove(self.rotated_path)
+
+    def flush(self):
+        """
+        Waits until the tickets in the queue are committed
+        :return:
+        """
+        self.queue.join()
+
+    def close(self):
+        if self.writer is None:
+            return
+        self.closed.set()
+        self.writer.join()
+        self.writer = None
+        self.truncate_journal()
+        self.journal.close()
+        self.connection.close()
+
+    def throughput(self, since=None, until=None, bucket=3600, drink=None) -> list:
+        """
+        Number of served beverages per time bucket
+        :param since: start of the period (unix time), the beginning if None
+        :param until: end of the period (unix time), now if None
+        :param bucket: length of the time bucket in seconds
+        :param drink: name of the beverage, every beverage if None
+        :return: list of tuples (start of the bucket, drink, count) ordered by time and drink
+        """
+        query = ('SELECT CAST(confirmed / ? AS INTEGER) * ? AS bucket, drink, COUNT(*) FROM ticket_drinks '
+                 'WHERE confirmed >= ? AND confirmed < ?')
+        parameters = [bucket, bucket, since or 0.0, until or time.time()]
+        if drink is not None:
+            query += ' AND drink = ?'
+            parameters.append(drink)
+        query += ' GROUP BY bucket, drink ORDER BY bucket, drink'
+        # readers have their own connection, WAL lets them run next to the writer
+        with sqlite3.connect(self.path) as connection:
+            return [tuple(row) for row in connection.execute(query, parameters)]
+
+    def report(self) -> dict:
+        """
+        :return: counters of the sink. Keys: submitted, committed, batches, overflows, recovered, pending
+        """
+        return dict(self.statistics, pending=self.queue.qsize())
@@ -0,0 +1,6 @@
+# Scripted dialogs, each of them ends with a rejection so the main loop finishes. They are replayed by the
+# benchmark and by the tests.
+scenarios = {'plain_order': ['a cola please', 'no thanks'],
+             'unspecified_tea': ['i would like tea', 'green tea', 'no thanks'],
+             'alcohol_with_age': ['vodka and orange juice', 'i am 25', 'nothing'],
+             'rejection': ['no thanks']}
@@ -0,0 +1,110 @@
+# Thin entry point of the bar station. Only the standard library is imported here, the models and the audio stack live
+# in the resident daemon (station_daemon.py), so the client starts instantly:
+#     python station.py serve      starts the daemon in the foreground
+#     python station.py session    serves one customer, the daemon is started in the background if it is not running
+#                                  (--language de serves the customer in German)
+#     python station.py reload     reads the menu and the prompts from bar_config again
+#     python station.py status
+#     python station.py throughput served beverages per hour (--bucket, --since and --drink narrow it down)
+#     python station.py stop
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+
+class StationClient(object):
+    def __init__(self, host='127.0.0.1', port=8766):
+        self.host = host
+        self.port = port
+
+    def request(self, request: dict, timeout=None) -> dict:
+        """
+        :param request: request of the daemon (see StationDaemon)
+        :param timeout: seconds to wait for the response, None waits until it comes (e.g., end of the dialog)
+        :return: response of the daemon
+        """
+        with socket.create_connection((self.host, self.port), timeout=5.0) as connection:
+            connection.settimeout(timeout)
+            with connection.makefile('rw', encoding='utf-8') as stream:
+                stream.write(json.dumps(request) + '\n')
+                stream.flush()
+                return json.loads(stream.readline())
+
+    def is_running(self) -> bool:
+        try:
+            socket.create_connection((self.host, self.port), timeout=0.5).close()
+            return True
+        except OSError:
+            return False
+
+    def spawn(self, timeout=120.0, log_path=None, options=()) -> bool:
+        """
+        Starts the daemon in the background and waits until it accepts connections
+        :param timeout: seconds to wait for the model and the audio stack to load
+        :param log_path: file of the output of the daemon, discarded if None
+        :param options: other command line options of the daemon (e.g., ['--memory-budget', '800'])
+        :return: flag whether the daemon is ready
+        """
+        daemon = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'station_daemon.py')
+        log = open(log_path, 'a') if log_path else subprocess.DEVNULL
+        try:
+            command = [sys.executable, daemon, '--host', self.host, '--port', str(self.port), '--no-trees']
+            subprocess.Popen(command + list(options), stdout=log, stderr=log, stdin=subprocess.DEVNULL, start_new_session=True)
+        finally:
+            if log_path:
+                log.close()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.is_running():
+                return True
+            time.sleep(0.1)
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Client of the resident bar station')
+    parser.add_argument('command', choices=['serve', 'session', 'reload', 'status', 'throughput', 'stop'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--customers', type=int, default=1, help='number of customers served by session')
+    parser.add_argument('--language', help='language of the customer served by session')
+    parser.add_argument('--log', help='output file of the daemon started in the background')
+    parser.add_argument('--bucket', type=int, default=3600, help='seconds per bucket of throughput')
+    parser.add_argument('--since', type=float, help='unix time where throughput starts')
+    parser.add_argument('--drink', help='beverage of throughput, every beverage if not given')
+    arguments, rest = parser.parse_known_args()
+
+    if arguments.command == 'serve':
+        # the heavy imports happen only here
+        from station_daemon import main as serve
+        if arguments.language:
+            rest += ['--language', arguments.language]
+        serve(['--host', arguments.host, '--port', str(arguments.port)] + rest)
+        return
+
+    client = StationClient(arguments.host, arguments.port)
+    if not client.is_running():
+        if arguments.command != 'session':
+            print('Station is not running')
+            sys.exit(1)
+        if not client.spawn(log_path=arguments.log, options=rest):
+            print('Station did not start')
+            sys.exit(1)
+
+    if arguments.command == 'session':
+        for _ in range(arguments.customers):
+            print(json.dumps(client.request({'op': 'session', 'language': arguments.language})))
+    elif arguments.command == 'throughput':
+        request = {'op': 'throughput', 'bucket': arguments.bucket, 'since': arguments.since, 'drink': arguments.drink}
+        for bucket, drink, count in client.request(request, timeout=60.0)['throughput']:
+            print('{}\t{}\t{}'.format(time.strftime('%Y-%m-%d %H:%M', time.localtime(bucket)), drink, count))
+    else:
+        print(json.dumps(client.request({'op': arguments.command}, timeout=600.0)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,328 @@
+import argparse
+import asyncio
+import atexit
+import importlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import speech_recognition as sr
+
+from default_settings import Settings
+from bar_settings import Bar
+from nlp_settings import NLP
+from menu import Menu
+from fuzzy_menu import FuzzyMenu
+from audio_cache import AudioCache
+from model_registry import registry
+from tracing import tracer
+from extraction_cache import ParseCache
+from tiered_extractor import TieredExtractor
+from language_pool import LanguagePool, language_config
+from barge_in import BargeIn
+from order_tickets import TicketSink
+from streaming_recognition import EnergyVAD, GoogleBackend, VoskBackend, FileBackend, StreamingCapture
+from dialog_machine import DialogMachine
+from async_runtime import AsyncSettings, run_dialog
+
+
+class StationLanguage(object):
+    def __init__(self, config, nlp_settings):
+        """
+        Resources of one language of the station: the model and the menu objects built from its configuration
+        :param config: configuration module of the language (e.g., bar_config)
+        :param nlp_settings: NLP object with the model of the language
+        """
+        self.config = config
+        self.nlp_settings = nlp_settings
+        self.menu = None
+        self.fuzzy_menu = None
+        self.bar = None
+        self.machine = None
+        self.extractor = None
+
+
+class Station(object):
+    def __init__(self, language='en', show_trees=True, budget=None, max_languages=None, barge_in=True,
+                 capture='listen', capture_source=None, data_dir=None):
+        """
+        Models, caches and audio devices of one bar station. The audio devices are opened once by load, languages
+        are loaded when the first customer speaks them and evicted when they do not fit in the memory budget. The
+        menus and the prompts can be reloaded from the configuration modules without touching the models.
+        :param language: language of the customer if the session does not tell otherwise
+        :param show_trees: flag whether the nltk tree of every parsed order is printed
+        :param budget: upper bound of the memory of the loaded languages in bytes, None means no bound
+        :param max_languages: upper bound of the number of loaded languages, None means no bound
+        :param barge_in: flag whether the customer can interrupt the bot (e.g., a regular who knows the menu)
+        :param capture: recognizer of the customer. 'listen' records the whole utterance and sends it to Google,
+                        the others capture the speech chunk by chunk: 'google', 'vosk' (offline, it keeps working
+                        when the uplink drops) or 'file' (scripted transcripts)
+        :param capture_source: directory of the vosk model or file of the transcripts
+        :param data_dir: directory of the audio and parse caches, the orders and the calibration, the code directory
+                         if None
+        """
+        self.language = language
+        self.show_trees = show_trees
+        self.barge_in = barge_in
+        self.capture = capture
+        self.capture_source = capture_source
+        self.data_dir = data_dir
+        self.settings = None
+        self.async_settings = None
+        self.tickets = None
+        self.pool = LanguagePool(self.load_language, self.unload_language, budget, max_languages)
+        # fixed sentences are synthesized in the background, loading and reloading do not wait for them
+        self.prewarmer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prewarm')
+
+    def load(self):
+        """
+        Opens the microphone, restores the audio cache and loads the default language
+        :return:
+        """
+        recognizer = sr.Recognizer()
+        # capture and barge-in never listen at the same time, so they share the backend
+        backend = self.capture_backend(recognizer)
+        capture = None
+        if self.capture != 'listen':
+            capture = StreamingCapture(backend, EnergyVAD(recognizer=recognizer))
+        barge_in = None
+        if self.barge_in:
+            barge_in = BargeIn(backend, EnergyVAD(recognizer=recognizer))
+        self.settings = Settings(sr.Microphone(), recognizer, self.language, capture=capture, barge_in=barge_in,
+                                 data_dir=self.data_dir)
+        self.settings.cache = AudioCache(os.path.join(self.settings.path_for_music, 'tts_cache'))
+        self.async_settings = AsyncSettings(self.settings)
+        self.tickets = TicketSink(os.path.join(self.settings.path_for_music, 'orders.sqlite3'))
+        self.tickets.start()
+        atexit.register(self.tickets.close)
+        atexit.register(self.save)
+        # measurements are collected only if BAR_TRACE=1 is set or the scrape endpoint is served
+        if tracer.enabled:
+            atexit.register(tracer.export, os.path.join(self.settings.path_for_music, 'trace.json'))
+        self.select(self.language)
+
+    def capture_backend(self, recognizer) -> object:
+        """
+        :param recognizer: speech_recognition recognizer
+        :return: recognizer backend of the streaming capture, Google for 'listen' (used by barge-in)
+        """
+        if self.capture in ('listen', 'google'):
+            return GoogleBackend(recognizer, self.language)
+        if self.capture_source is None:
+            raise ValueError('{} capture needs --capture-source'.format(self.capture))
+        if self.capture == 'vosk':
+            return VoskBackend(self.capture_source)
+        if self.capture == 'file':
+            return FileBackend(self.capture_source)
+        raise ValueError('unknown capture {}'.format(self.capture))
+
+    def load_language(self, language: str) -> StationLanguage:
+        """
+        Loads the model of the language and restores its persisted parse cache
+        :param language: language code
+        :return: resources of the language
+        """
+        config = language_config(language)
+        cache_path = os.path.join(self.settings.path_for_music, 'parse_cache_{}.spacy'.format(language))
+        nlp_settings = NLP(patterns=config.patterns, cache=ParseCache(path=cache_path), model=config.model,
+                           components=config.components)
+        nlp_settings.cache.load(nlp_settings.tokenizer.vocab)
+        resources = StationLanguage(config, nlp_settings)
+        self.configure(resources)
+        return resources
+
+    def unload_language(self, language: str, resources: StationLanguage):
+        resources.nlp_settings.cache.save()
+        model = resources.nlp_settings.model
+        if not any(self.pool.languages[each].nlp_settings.model == model for each in self.pool.languages):
+            registry.unload(model)
+
+    def configure(self, resources: StationLanguage):
+        """
+        Builds the menu objects and compiles the dialog from the configuration of the language, the fixed sentences
+        which are not cached yet are synthesized in the background
+        :param resources: resources of the language
+        :return:
+        """
+        config, nlp_settings = resources.config, resources.nlp_settings
+        menu = Menu(config.cold_drinks, config.hot_drinks, config.tea, config.alcohol)
+        fuzzy_menu = FuzzyMenu(menu)
+        bar = Bar(self.settings, nlp_settings, menu, fuzzy_menu, config, self.tickets)
+        machine = DialogMachine(bar)
+        extractor = TieredExtractor(nlp_settings, menu, config.rejection, config.fillers, fuzzy_menu)
+        # every fixed prompt and menu sentence is synthesized once, afterwards it is only played
+        self.prewarmer.submit(self.prewarm, [config.another_order, config.repeat, config.goodbye] +
+                              bar.static_sentences(), config.language)
+        # the next customer gets the new objects, the running dialog keeps the ones it started with
+        resources.menu, resources.fuzzy_menu, resources.bar, resources.extractor = menu, fuzzy_menu, bar, extractor
+        resources.machine = machine
+
+    def prewarm(self, sentences: list, language: str):
+        """
+        Runs in the background thread. A sentence which is spoken before it is synthesized here is synthesized
+        when it is spoken.
+        :param sentences: fixed sentences of the language
+        :param language: language code
+        :return:
+        """
+        try:
+            self.settings.prewarm(sentences, language)
+        except Exception as e:
+            print("Sentences of the language {0} could not be synthesized in advance; {1}".format(language, e))
+
+    def reload(self):
+        """
+        Reads the configuration of the loaded languages again, e.g., after the menu or the prompts were edited
+        :return:
+        """
+        with self.pool.lock:
+            for language in self.pool.loaded():
+                resources = self.pool.languages[language]
+                resources.config = importlib.reload(resources.config)
+                self.configure(resources)
+
+    def select(self, language: str) -> StationLanguage:
+        """
+        Switches the station to the language of the next customer
+        :param language: language code
+        :return: resources of the language
+        """
+        resources = self.pool.get(language)
+        self.settings.select_language(language)
+        return resources
+
+    async def serve_customer(self, language=None):
+        """
+        Dialog with one customer
+        :param language: language of the customer, the default language of the station if None
+        :return:
+        """
+        resources = await AsyncSettings.run_blocking(self.select, language or self.language)
+        # resources.bar.introduction()
+        await run_dialog(self.async_settings, resources.machine, resources.nlp_settings, self.show_trees,
+                         parse=resources.extractor.parse)
+
+    def save(self):
+        with self.pool.lock:
+            for resources in self.pool.languages.values():
+                resources.nlp_settings.cache.save()
+
+    def status(self) -> dict:
+        """
+        :return: dictionary of the loaded models, the languages of the pool with their load time and memory, and the
+                 parse caches of the loaded languages
+        """
+        caches = {}
+        with self.pool.lock:
+            for language, resources in self.pool.languages.items():
+                cache = resources.nlp_settings.cache
+                caches[language] = {'entries': len(cache.docs), 'hits': cache.hits, 'misses': cache.misses,
+                                    'menu': len(resources.menu)}
+        return {'models': registry.report(), 'languages': self.pool.report(), 'footprint': self.pool.footprint(),
+                'budget': self.pool.budget, 'parse_cache': caches, 'tickets': self.tickets.report()}
+
+
+class StationDaemon(object):
+    def __init__(self, station):
+        """
+        Resident process which keeps the station loaded and serves the requests of the thin client (station.py).
+        Requests and responses are JSON lines over TCP:
+            {"op": "session", "language": code}  -> {"duration": seconds, "served": number of customers}, returns when
+                                                    the customer left, language is optional
+            {"op": "reload"}                     -> {"reloaded": true, "duration": seconds}
+            {"op": "status"}                     -> {"uptime": seconds, "served": number, "busy": bool, ...}
+            {"op": "throughput", "since": time, "until": time, "bucket": seconds, "drink": name}
+                                                 -> {"throughput": [[bucket start, drink, count], ...]}, the
+                                                    arguments are optional (see TicketSink.throughput)
+            {"op": "stop"}                       -> {"stopped": true}
+        Customers are served one by one, as there is only one microphone.
+        :param station: loaded Station object
+        """
+        self.station = station
+        self.started = time.time()
+        self.served = 0
+        self.busy = asyncio.Lock()
+        self.server = None
+
+    async def dispatch(self, request: dict) -> dict:
+        operation = request.get('op')
+        if operation == 'session':
+            async with self.busy:
+                start = time.perf_counter()
+                await self.station.serve_customer(request.get('language'))
+                self.served += 1
+            return {'duration': time.perf_counter() - start, 'served': self.served}
+        if operation == 'reload':
+            start = time.perf_counter()
+            await AsyncSettings.run_blocking(self.station.reload)
+            return {'reloaded': True, 'duration': time.perf_counter() - start}
+        if operation == 'status':
+            status = self.station.status()
+            status.update({'uptime': time.time() - self.started, 'served': self.served, 'busy': self.busy.locked()})
+            return status
+        if operation == 'throughput':
+            rows = await AsyncSettings.run_blocking(self.station.tickets.throughput, request.get('since'),
+                                                    request.get('until'), request.get('bucket', 3600),
+                                                    request.get('drink'))
+            return {'throughput': rows}
+        if operation == 'stop':
+            self.server.close()
+            return {'stopped': True}
+        return {'error': 'unknown operation'}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = await self.dispatch(json.loads(line))
+                except ValueError:
+                    response = {'error': 'invalid request'}
+                except Exception as e:
+                    response = {'error': '{}: {}'.format(type(e).__name__, e)}
+                writer.write((json.dumps(response) + '\n').encode('utf-8'))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8766):
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        print('Station is ready on {}:{}'.format(host, port), flush=True)
+        async with self.server:
+            try:
+                await self.server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Resident station of the bar')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--language', default='en', help='language of the customers if the session does not tell')
+    parser.add_argument('--memory-budget', type=int, help='memory of the loaded languages in megabytes')
+    parser.add_argument('--max-languages', type=int, help='number of languages kept loaded')
+    parser.add_argument('--no-trees', action='store_true', help='do not print the nltk trees of the orders')
+    parser.add_argument('--no-barge-in', action='store_true', help='customers cannot interrupt the bot')
+    parser.add_argument('--capture', choices=['listen', 'google', 'vosk', 'file'], default='listen',
+                        help='recognizer of the customer, vosk works offline')
+    parser.add_argument('--capture-source', help='directory of the vosk model or file of the transcripts')
+    parser.add_argument('--metrics-port', type=int, help='port of the Prometheus scrape endpoint, none if not given')
+    parser.add_argument('--data-dir', help='directory of the caches, the orders and the calibration, the code '
+                                           'directory if not given')
+    arguments = parser.parse_args(arguments)
+    if arguments.metrics_port:
+        tracer.serve(arguments.metrics_port)
+
+    budget = arguments.memory_budget * 1024 * 1024 if arguments.memory_budget else None
+    station = Station(arguments.language, not arguments.no_trees, budget, arguments.max_languages,
+                      not arguments.no_barge_in, arguments.capture, arguments.capture_source, arguments.data_dir)
+    station.load()
+    asyncio.run(StationDaemon(station).serve(arguments.host, arguments.port))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+import array
+import json
+import math
+import time
+import wave
+from collections import deque
+
+try:
+    import audioop
+except ImportError:
+    audioop = None
+
+
+def rms(chunk: bytes, sample_width: int) -> float:
+    """
+    Energy of the audio chunk
+    :param chunk: raw PCM audio
+    :param sample_width: bytes per sample
+    :return: root mean square of the samples
+    """
+    if audioop is not None:
+        return audioop.rms(chunk, sample_width)
+    samples = array.array({1: 'b', 2: 'h', 4: 'i'}[sample_width], chunk[:len(chunk) - len(chunk) % sample_width])
+    if not samples:
+        return 0
+    return math.sqrt(sum(each * each for each in samples) / len(samples))
+
+
+class EnergyVAD(object):
+    def __init__(self, threshold=300, recognizer=None):
+        """
+        Voice activity detection by the energy of the chunk
+        :param threshold: energy threshold which is used if recognizer is not given
+        :param recognizer: speech_recognition recognizer, its calibrated energy_threshold is used
+        """
+        self.threshold = threshold
+        self.recognition = recognizer
+
+    @property
+    def energy_threshold(self) -> float:
+        return self.recognition.energy_threshold if self.recognition is not None else self.threshold
+
+    def is_speech(self, chunk: bytes, sample_width: int) -> bool:
+        return rms(chunk, sample_width) > self.energy_threshold
+
+
+class SustainedVAD(object):
+    def __init__(self, vad, min_chunks=3, factor=1.5):
+        """
+        Voice activity detection which reports speech only after several loud chunks in a row and with a higher
+        threshold. It is used while the bot is speaking, so clicks and the echo of the speakers do not count as
+        speech of the customer.
+        :param vad: EnergyVAD object
+        :param min_chunks: number of loud chunks in a row which start the speech
+        :param factor: multiplier of the energy threshold of the vad
+        """
+        self.vad = vad
+        self.min_chunks = min_chunks
+        self.factor = factor
+        self.loud_chunks = 0
+
+    def is_speech(self, chunk: bytes, sample_width: int) -> bool:
+        if rms(chunk, sample_width) > self.vad.energy_threshold * self.factor:
+            self.loud_chunks += 1
+        else:
+            self.loud_chunks = 0
+        return self.loud_chunks >= self.min_chunks
+
+
+class RecognizerBackend(object):
+    """
+    Base of recognizer backends. Audio chunks are fed as they arrive and the transcript is taken at the end of
+    the speech.
+    """
+    name = 'base'
+
+    def start(self, sample_rate: int, sample_width: int):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+
+    def feed(self, chunk: bytes):
+        raise NotImplementedError
+
+    def finish(self) -> object:
+        """
+        :return: transcript of the speech, None if it was not understood
+        """
+        raise NotImplementedError
+
+
+class GoogleBackend(RecognizerBackend):
+    name = 'google'
+
+    def __init__(self, recognizer, language='en-US'):
+        """
+        Google Speech Recognition does not accept streamed audio, chunks are collected and sent at the end.
+        :param recognizer: speech_recognition recognizer
+        :param language: language of the speech (e.g., 'en-US', 'de')
+        """
+        self.recognition = recognizer
+        self.language = language
+        self.chunks = []
+
+    def start(self, sample_rate, sample_width):
+        super(GoogleBackend, self).start(sample_rate, sample_width)
+        self.chunks = []
+
+    def feed(self, chunk):
+        self.chunks.append(chunk)
+
+    def finish(self):
+        import speech_recognition as sr
+        audio_customer = sr.AudioData(b''.join(self.chunks), self.sample_rate, self.sample_width)
+        try:
+            return self.recognition.recognize_google(audio_customer, language=self.language)
+        except sr.UnknownValueError:
+            print("Google Speech Recognition could not understand what you said!")
+        except sr.RequestError as e:
+            print("Could not request results from Google SRS; {0}".format(e))
+
+
+class VoskBackend(RecognizerBackend):
+    name = 'vosk'
+
+    def __init__(self, model_path: str):
+        """
+        Offline recognizer which decodes every chunk as it arrives. Needs the vosk package and a downloaded model.
+        :param model_path: directory of the vosk model
+        """
+        from vosk import Model
+        self.model = Model(model_path)
+        self.decoder = None
+
+    def start(self, sample_rate, sample_width):
+        from vosk import KaldiRecognizer
+        super(VoskBackend, self).start(sample_rate, sample_width)
+        self.decoder = KaldiRecognizer(self.model, sample_rate)
+
+    def feed(self, chunk):
+        self.decoder.AcceptWaveform(chunk)
+
+    def finish(self):
+        text = json.loads(self.decoder.FinalResult()).get('text', '')
+        return text or None
+
+
+class FileBackend(RecognizerBackend):
+    name = 'file'
+
+    def __init__(self, transcripts):
+        """
+        Deterministic stand-in for tests. Audio is ignored and every utterance returns the next transcript.
+        :param transcripts: path of a text file (one transcript per line, empty line means not understood)
+                            or list of transcripts
+        """
+        if isinstance(transcripts, str):
+            with open(transcripts) as transcript_file:
+                transcripts = [line.rstrip('\n') for line in transcript_file]
+        self.transcripts = deque(transcripts)
+
+    def feed(self, chunk):
+        pass
+
+    def finish(self):
+        if not self.transcripts:
+            return None
+        return self.transcripts.popleft() or None
+
+
+class WaveFileSource(object):
+    CHUNK = 1024
+
+    def __init__(self, path: str, chunk_size: int = 1024):
+        """
+        Deterministic audio source which reads a wav file like a microphone stream
+        :param path: path of the wav file
+        :param chunk_size: frames per chunk
+        """
+        self.path = path
+        self.CHUNK = chunk_size
+        self.stream = None
+
+    def __enter__(self):
+        self.wave_file = wave.open(self.path, 'rb')
+        self.SAMPLE_RATE = self.wave_file.getframerate()
+        self.SAMPLE_WIDTH = self.wave_file.getsampwidth()
+        self.stream = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wave_file.close()
+        self.stream = None
+
+    def read(self, size: int) -> bytes:
+        return self.wave_file.readframes(size)
+
+
+class SyntheticSource(object):
+    CHUNK = 1024
+    SAMPLE_RATE = 16000
+    SAMPLE_WIDTH = 2
+
+    def __init__(self, segments, chunk_size=1024, realtime=True):
+        """
+        Deterministic audio source for tests which generates the audio like a microphone stream: a square wave of
+        the given amplitude for every segment, 0 amplitude is silence.
+        :param segments: list of tuples (seconds, amplitude), e.g., [(0.5, 0), (0.6, 3000), (1.0, 0)]
+        :param chunk_size: frames per chunk
+        :param realtime: flag whether read waits for the duration of the chunk like a real microphone
+        """
+        self.segments = list(segments)
+        self.CHUNK = chunk_size
+        self.realtime = realtime
+        self.stream = None
+        self.frames = None
+
+    def __enter__(self):
+        self.frames = deque()
+        for seconds, amplitude in self.segments:
+            self.frames.append((int(seconds * self.SAMPLE_RATE), amplitude))
+        self.stream = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream = None
+
+    def read(self, size: int) -> bytes:
+        samples = array.array('h')
+        while len(samples) < size and self.frames:
+            remaining, amplitude = self.frames.popleft()
+            count = min(remaining, size - len(samples))
+            samples.extend(amplitude if (len(samples) + index) % 2 else -amplitude for index in range(count))
+            if remaining > count:
+                self.frames.appendleft((remaining - count, amplitude))
+        if self.realtime and samples:
+            time.sleep(float(len(samples)) / self.SAMPLE_RATE)
+        return samples.tobytes()
+
+
+class StreamingCapture(object):
+    def __init__(self, backend, vad, end_silence=0.8, timeout=10.0, max_duration=15.0, pre_roll=3):
+        """
+        Captures the speech chunk by chunk and feeds the chunks to the backend while the customer is speaking
+        :param backend: recognizer backend
+        :param vad: voice activity detector
+        :param end_silence: seconds of silence which mark the end of speech
+        :param timeout: seconds to wait for the start of speech
+        :param max_duration: upper bound of the utterance in seconds
+        :param pre_roll: chunks before the detected start of speech which are also fed to the backend
+        """
+        self.backend = backend
+        self.vad = vad
+        self.end_silence = end_silence
+        self.timeout = timeout
+        self.max_duration = max_duration
+        self.pre_roll = pre_roll
+        # seconds of every chunk fed to the backend and from the end of speech to the transcript, last utterance
+        self.latencies = {'chunks': [], 'finish': 0.0}
+
+    def capture(self, source, on_speech=None, cancel=None) -> object:
+        """
+        :param source: opened microphone (or WaveFileSource)
+        :param on_speech: function which is called when the speech starts (e.g., to stop the playback)
+        :param cancel: threading.Event, waiting for the speech stops when it is set
+        :return: transcript of the speech, None if nothing was said or understood
+        """
+        sample_rate, sample_width = source.SAMPLE_RATE, source.SAMPLE_WIDTH
+        chunk_seconds = float(source.CHUNK) / sample_rate
+        self.latencies = {'chunks': [], 'finish': 0.0}
+        buffered = deque(maxlen=self.pre_roll)
+        waited = 0.0
+        while True:
+            chunk = source.stream.read(source.CHUNK)
+            if not chunk or (cancel is not None and cancel.is_set()):
+                return None
+            if self.vad.is_speech(chunk, sample_width):
+                break
+            buffered.append(chunk)
+            waited += chunk_seconds
+            if waited >= self.timeout:
+                return None
+
+        if on_speech is not None:
+            on_speech()
+        self.backend.start(sample_rate, sample_width)
+        for each in buffered:
+            self.feed(each)
+        self.feed(chunk)
+        silence = 0.0
+        duration = chunk_seconds
+        while silence < self.end_silence and duration < self.max_duration:
+            chunk = source.stream.read(source.CHUNK)
+            if not chunk:
+                break
+            self.feed(chunk)
+            duration += chunk_seconds
+            silence = 0.0 if self.vad.is_speech(chunk, sample_width) else silence + chunk_seconds
+
+        start = time.perf_counter()
+        transcript = self.backend.finish()
+        self.latencies['finish'] = time.perf_counter() - start
+        return transcript
+
+    def feed(self, chunk: bytes):
+        start = time.perf_counter()
+        self.backend.feed(chunk)
+        self.latencies['chunks'].append(time.perf_counter() - start)
@@ -0,0 +1,106 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bar_config
+from bar_settings import Bar
+from dialog_machine import DialogMachine
+from fuzzy_menu import FuzzyMenu
+from menu import Menu
+from number_parser import NumberWords, extract_numbers
+
+
+class ListSink(object):
+    """
+    Stand-in of TicketSink which keeps the tickets in memory
+    """
+    def __init__(self):
+        self.tickets = []
+
+    def submit(self, ticket):
+        self.tickets.append(ticket)
+        return True
+
+
+def extract(menu, text, config=bar_config) -> object:
+    """
+    Extraction of the utterance without the language model: phrases of the menu are matched and the other words
+    which are not fillers are taken as possible drinks, like the nouns found by NLP.extract_drinks
+    :return: extraction of the turn (see dialog_machine.extract_turn), None if text is None
+    """
+    if text is None:
+        return None
+    tokens = text.lower().split()
+    matches = menu.match_tokens(tokens)
+    covered = {index for (start, end, _) in matches for index in range(start, end)}
+    rejected = any(each in config.rejection for each in tokens)
+    candidates = [name for (_, _, name) in matches]
+    candidates += [each for (index, each) in enumerate(tokens)
+                   if index not in covered and each not in config.fillers and each.isalpha()]
+    return {'tokens': tokens,
+            'candidates': [] if rejected else candidates,
+            'numbers': extract_numbers(text, NumberWords(**config.number_words)),
+            'rejected': rejected,
+            'tier': 1}
+
+
+class Doc(list):
+    """
+    Stand-in of the spaCy Doc: list of tokens which have a text, and the user data
+    """
+    def __init__(self, text):
+        super().__init__(SimpleNamespace(text=each) for each in text.split())
+        self.user_data = {}
+
+
+class StubNLP(object):
+    """
+    Stand-in of NLP without the language model. The tokenizer splits at whitespace, the parser takes the words which
+    are not fillers for possible drinks, like the nouns found by NLP.extract_drinks. Parsed transcripts are recorded.
+    """
+    def __init__(self, config=bar_config):
+        self.config = config
+        self.cache = None
+        self.parsed = []
+        self.tokenizer = SimpleNamespace(tokenizer=Doc, pipe=self.pipe)
+
+    def pipe(self, texts, batch_size=None):
+        for text in texts:
+            yield self.parse(text)
+
+    def parse(self, text):
+        self.parsed.append(text)
+        return Doc(' '.join(text.lower().split()))
+
+    @staticmethod
+    def list_of_tokens(doc):
+        return [each.text for each in doc]
+
+    def extract_drinks(self, order_doc):
+        drinks = order_doc.user_data.get('drinks')
+        if drinks is None:
+            drinks = [each for each in self.list_of_tokens(order_doc)
+                      if each not in self.config.fillers and each.isalpha()]
+        return list(drinks)
+
+    def is_rejection(self, order_doc, rejection):
+        return any(each in rejection for each in self.list_of_tokens(order_doc))
+
+
+@pytest.fixture
+def menu():
+    return Menu(bar_config.cold_drinks, bar_config.hot_drinks, bar_config.tea, bar_config.alcohol)
+
+
+@pytest.fixture
+def tickets():
+    return ListSink()
+
+
+@pytest.fixture
+def machine(menu, tickets):
+    return DialogMachine(Bar(None, None, menu, FuzzyMenu(menu), tickets=tickets))
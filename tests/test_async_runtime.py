@@ -0,0 +1,76 @@
+import asyncio
+from contextlib import contextmanager
+
+from async_runtime import AsyncSettings
+from audio_stream import MemoryPlayer
+
+
+class Calibrator(object):
+    @contextmanager
+    def paused(self):
+        yield
+
+
+class StreamingSettings(object):
+    """
+    Stand-in of Settings with a streaming player. Synthesis of the sentences in failing raises, the sentences
+    in broken cannot be played.
+    """
+    def __init__(self, failing=(), broken=()):
+        self.player = MemoryPlayer()
+        self.calibrator = Calibrator()
+        self.barge_in = None
+        self.failing = set(failing)
+        self.broken = set(broken)
+        self.streamed = []
+
+    def synthesize_audio(self, response):
+        if response in self.failing:
+            raise ConnectionError('synthesis of {} failed'.format(response))
+        return response.encode('utf-8')
+
+    def stream_speech(self, response, audio=None):
+        if response in self.broken:
+            raise RuntimeError('player of {} failed'.format(response))
+        self.streamed.append((response, audio))
+        return self.player.play([audio or b'live ' + response.encode('utf-8')])
+
+
+def test_prefetched_audio_is_played():
+    settings = StreamingSettings()
+
+    async def speak():
+        runtime = AsyncSettings(settings)
+        runtime.prefetch('cola')
+        await runtime.speech_generator('cola')
+        await runtime.speech_generator('tea')
+
+    asyncio.run(speak())
+    assert settings.streamed == [('cola', b'cola'), ('tea', None)]
+
+
+def test_failed_prefetch_is_streamed_live(capsys):
+    settings = StreamingSettings(failing=['cola'])
+
+    async def speak():
+        runtime = AsyncSettings(settings)
+        runtime.prefetch('cola')
+        await runtime.speech_generator('cola')
+
+    asyncio.run(speak())
+    assert settings.streamed == [('cola', None)]
+    assert settings.player.played == [b'live cola']
+    assert 'synthesis of cola failed' in capsys.readouterr().out
+
+
+def test_playback_error_is_reported(capsys):
+    settings = StreamingSettings(broken=['cola'])
+
+    async def speak():
+        runtime = AsyncSettings(settings)
+        await runtime.speech_generator('cola')
+        await runtime.speech_generator('tea')
+
+    asyncio.run(speak())
+    assert settings.streamed == [('tea', None)]
+    assert 'player of cola failed' in capsys.readouterr().out
@@ -0,0 +1,100 @@
+import os
+import threading
+
+from audio_cache import AudioCache
+
+
+def test_put_and_get(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    assert cache.get('hello', 'en') is None
+    path = cache.put_bytes('hello', 'en', b'ID3hello')
+    assert cache.get('hello', 'en') == path
+    assert cache.get('hello', 'de') is None
+    with open(path, 'rb') as audio_file:
+        assert audio_file.read() == b'ID3hello'
+
+
+def test_least_recently_used_is_evicted(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=20)
+    first = cache.put_bytes('first', 'en', b'x' * 8)
+    cache.put_bytes('second', 'en', b'x' * 8)
+    cache.get('first', 'en')
+    cache.put_bytes('third', 'en', b'x' * 8)
+    assert cache.get('second', 'en') is None
+    assert cache.get('first', 'en') == first
+    assert cache.total_bytes == 16
+
+
+def test_index_is_restored(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    kept = cache.put_bytes('kept', 'en', b'kept')
+    os.remove(cache.put_bytes('removed', 'en', b'removed'))
+    restored = AudioCache(str(tmp_path))
+    assert restored.get('kept', 'en') == kept
+    assert restored.get('removed', 'en') is None
+    assert restored.total_bytes == 4
+
+
+def test_failed_synthesis_leaves_nothing(tmp_path):
+    cache = AudioCache(str(tmp_path))
+
+    def synthesize(path):
+        raise OSError('connection dropped')
+
+    try:
+        cache.put('sentence', 'en', synthesize)
+    except OSError:
+        pass
+    assert cache.get('sentence', 'en') is None
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_concurrent_writers(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=2000)
+    errors = []
+
+    def write():
+        for number in range(200):
+            try:
+                cache.put_bytes('sentence {}'.format(number % 30), 'en', b'x' * 100)
+            except Exception as e:
+                errors.append(e)
+
+    writers = [threading.Thread(target=write) for _ in range(3)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    assert errors == []
+    assert cache.total_bytes == sum(cache.entries.values()) <= 2000
+    assert len(AudioCache(str(tmp_path)).entries) == len(cache.entries)
+
+
+def test_read_while_other_threads_write_and_evict(tmp_path):
+    # room for two sentences only, every write evicts another one
+    cache = AudioCache(str(tmp_path), max_bytes=2 * 1024)
+    sentences = ['sentence {}'.format(number) for number in range(6)]
+    audio = {sentence: sentence.encode('utf-8').ljust(1024, b'.') for sentence in sentences}
+    errors = []
+
+    def write():
+        for _ in range(30):
+            for sentence in sentences:
+                cache.put_bytes(sentence, 'en', audio[sentence])
+
+    def read():
+        try:
+            for _ in range(30):
+                for sentence in sentences:
+                    found = cache.read(sentence, 'en')
+                    assert found is None or found == audio[sentence]
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(2)] + [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert cache.read('unknown', 'en') is None
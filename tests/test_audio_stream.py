@@ -0,0 +1,68 @@
+import shutil
+
+import pytest
+
+from audio_cache import AudioCache
+from audio_stream import MemoryPlayer, PipePlayer, StubSynthesizer
+
+
+def failing_stream(error):
+    yield b'ID3first'
+    raise error
+
+
+def test_stub_synthesizer_is_deterministic():
+    synthesizer = StubSynthesizer(chunks=3)
+    assert list(synthesizer.stream('cola')) == list(synthesizer.stream('cola'))
+    assert list(synthesizer.stream('cola')) != list(synthesizer.stream('tea'))
+
+
+def test_memory_player():
+    player = MemoryPlayer()
+    assert player.play(StubSynthesizer(chunks=2).stream('cola'))
+    assert len(player.played) == 1
+
+
+@pytest.mark.skipif(shutil.which('cat') is None, reason='needs cat as the player process')
+def test_pipe_player_reports_failed_streams():
+    player = PipePlayer(['cat'])
+    assert player.play(iter([b'ID3', b'rest']))
+    # connection of the synthesizer dropped (requests.ConnectionError is an OSError)
+    assert not player.play(failing_stream(ConnectionError('dropped')))
+    with pytest.raises(RuntimeError):
+        player.play(failing_stream(RuntimeError('synthesis failed')))
+    assert player.process is None
+
+
+class DroppingSynthesizer(StubSynthesizer):
+    def stream(self, text):
+        yield b'ID3first'
+        raise ConnectionError('dropped')
+
+
+@pytest.mark.skipif(shutil.which('cat') is None, reason='needs cat as the player process')
+def test_partial_speech_is_not_cached(tmp_path):
+    pytest.importorskip('gtts')
+    pytest.importorskip('playsound')
+    pytest.importorskip('speech_recognition')
+    from benchmark import FakeMicrophone, FakeRecognizer
+    from default_settings import Settings
+    cache = AudioCache(str(tmp_path))
+    settings = Settings(FakeMicrophone(), FakeRecognizer(), 'en', cache=cache, synthesizer=DroppingSynthesizer(),
+                        player=PipePlayer(['cat']))
+    assert not settings.stream_speech('Do you want to get something else?')
+    assert cache.get('Do you want to get something else?', 'en') is None
+
+
+def test_first_audio_is_traced(monkeypatch):
+    pytest.importorskip('gtts')
+    pytest.importorskip('playsound')
+    pytest.importorskip('speech_recognition')
+    from benchmark import FakeMicrophone, FakeRecognizer
+    from default_settings import Settings
+    from tracing import tracer
+    monkeypatch.setattr(tracer, 'enabled', True)
+    settings = Settings(FakeMicrophone(), FakeRecognizer(), 'en', synthesizer=StubSynthesizer(), player=MemoryPlayer())
+    observed = tracer.histograms['first_audio'].count
+    assert settings.stream_speech('Do you want to get something else?')
+    assert tracer.histograms['first_audio'].count == observed + 1
@@ -0,0 +1,15 @@
+from barge_in import simulate
+
+
+def test_barge_in_interrupts_the_bot():
+    result = simulate(speech_start=0.3, speech_duration=0.5, sentence_chunks=40, chunk_delay=0.05)
+    assert not result['completed']
+    assert result['played'] < result['sentence']
+    assert result['transcript'] == 'cola please'
+
+
+def test_bot_finishes_without_barge_in():
+    result = simulate(speech_start=5.0, speech_duration=0.5, sentence_chunks=10, chunk_delay=0.01)
+    assert result['completed']
+    assert result['transcript'] is None
+
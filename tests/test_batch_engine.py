@@ -0,0 +1,86 @@
+import io
+
+import pytest
+
+from batch_engine import BatchEngine, batches, read_records
+from conftest import StubNLP
+
+
+def test_read_records():
+    lines = io.StringIO('a cola please\n\n{"id": "x", "transcript": "a vodka", "answers": ["25"]}\nno thanks\n')
+    assert list(read_records(lines)) == [{'transcript': 'a cola please', 'id': 0},
+                                         {'id': 'x', 'transcript': 'a vodka', 'answers': ['25']},
+                                         {'transcript': 'no thanks', 'id': 3}]
+
+
+def test_batches():
+    assert list(batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batches([], 2)) == []
+
+
+@pytest.fixture
+def engine(menu):
+    return BatchEngine(StubNLP(), menu, batch_size=2)
+
+
+def decide(engine, transcript, *answers):
+    return next(engine.run([{'id': 0, 'transcript': transcript, 'answers': list(answers)}]))
+
+
+def test_short_order_is_not_parsed(engine):
+    decision = decide(engine, 'A cola please')
+    assert (decision['tier'], decision['drinks'], decision['case']) == (1, ['cola'], 0)
+    assert decision['response'] == 'Your cola is coming right now!'
+    assert engine.nlp.parsed == []
+
+
+@pytest.mark.parametrize('transcript, answer, drinks, case', [
+    ('a vodka', 'I am 25', ['vodka'], 1),
+    ('a vodka and a cola', 'fifteen', ['cola'], 3),
+    ('a vodka', '16', [], 2)])
+def test_age_check(engine, transcript, answer, drinks, case):
+    decision = decide(engine, transcript, answer)
+    assert (decision['drinks'], decision['case']) == (drinks, case)
+    assert decision['prompts'][0] == 'You have ordered vodka, which is alcoholic drink. Could you please tell me ' \
+                                     'your age?'
+    # answers to the age question are not parsed
+    assert engine.nlp.parsed == []
+
+
+def test_follow_up_question(engine):
+    decision = decide(engine, 'tea', 'green tea')
+    assert (decision['tier'], decision['drinks']) == (2, ['green tea'])
+    assert decision['prompts'][0] == engine.bar.ask_specially
+
+
+def test_not_an_order(engine):
+    decision = decide(engine, 'please')
+    assert not decision['is_order'] and decision['response'] == engine.bar.config.repeat
+
+
+def test_rejection_and_missing_answers(engine):
+    assert decide(engine, 'no thanks')['rejected']
+    assert decide(engine, 'a vodka')['error'] == 'bot asked more questions than the script answers'
+
+
+def test_not_selling(engine):
+    decision = decide(engine, 'a beer')
+    assert not decision['available'] and decision['response'] == engine.bar.not_selling
+
+
+def test_decisions_keep_the_order_of_the_records(engine):
+    records = [{'id': number, 'transcript': text} for (number, text) in
+               enumerate(['a beer', 'a cola', 'please', 'a beer', 'no'])]
+    assert [decision['id'] for decision in engine.run(records)] == [0, 1, 2, 3, 4]
+
+
+def test_worker_sends_its_measurements(engine, monkeypatch):
+    import batch_engine
+    from tracing import tracer
+    monkeypatch.setattr(tracer, 'enabled', True)
+    monkeypatch.setattr(batch_engine, 'worker_engine', engine)
+    tracer.take()
+    decisions, measurements = batch_engine.run_worker_batch([{'id': 0, 'transcript': 'a cola'}])
+    assert decisions[0]['drinks'] == ['cola']
+    assert 'tier_one' in [stage for (stage, _) in measurements['spans']]
+    assert tracer.take() == {'spans': [], 'counters': {}}
@@ -0,0 +1,16 @@
+import pytest
+
+for module in ('speech_recognition', 'gtts', 'playsound', 'nltk', 'spacy', 'en_core_web_sm'):
+    pytest.importorskip(module)
+
+from benchmark import run_benchmark
+from scenarios import scenarios
+
+
+def test_every_scenario_runs_through_the_dialog_loop():
+    report = run_benchmark(1, sorted(scenarios))
+    assert sorted(report['dialogs']) == sorted(scenarios)
+    assert report['stages']['decide']['count'] > 0
+    # short orders are answered by the tokenizer like in the station
+    assert report['stages']['tier_one']['count'] > 0
+    assert report['resident_memory'] > 0
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from calibration import MicCalibrator
+
+
+class Microphone(object):
+    device_index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class Recognizer(object):
+    """
+    Stand-in of the speech_recognition recognizer, the measured noise floor is set by the test. The hook runs while
+    the noise is measured.
+    """
+    def __init__(self, energy_threshold=300.0):
+        self.energy_threshold = energy_threshold
+        self.noise = energy_threshold
+        self.hook = None
+
+    def adjust_for_ambient_noise(self, source, duration=1):
+        if self.hook is not None:
+            self.hook()
+        self.energy_threshold = self.noise
+
+
+@pytest.fixture
+def recognizer():
+    return Recognizer()
+
+
+@pytest.fixture
+def calibrator(tmp_path, recognizer):
+    return MicCalibrator(Microphone(), recognizer, str(tmp_path / 'calibration.json'), smoothing=0.5, min_change=0.1)
+
+
+def stored(calibrator):
+    with open(calibrator.store_path) as store:
+        return json.load(store)
+
+
+def test_calibration_is_persisted_per_device(calibrator, recognizer):
+    assert not calibrator.load()
+    recognizer.noise = 400.0
+    calibrator.calibrate()
+    assert stored(calibrator) == {'default': 400.0}
+    other = MicCalibrator(Microphone(), Recognizer(), calibrator.store_path)
+    assert other.load() and other.recognition.energy_threshold == 400.0
+
+
+def test_sample_is_smoothed(calibrator, recognizer):
+    calibrator.calibrate()
+    recognizer.noise = 500.0
+    calibrator.sample()
+    assert recognizer.energy_threshold == 400.0
+    assert stored(calibrator) == {'default': 400.0}
+
+
+def test_small_drift_is_not_persisted(calibrator, recognizer):
+    calibrator.calibrate()
+    recognizer.noise = 340.0
+    calibrator.sample()
+    assert recognizer.energy_threshold == 320.0
+    assert stored(calibrator) == {'default': 300.0}
+
+
+def test_sample_is_skipped_while_paused(calibrator, recognizer):
+    calibrator.calibrate()
+    recognizer.noise = 900.0
+    with calibrator.paused():
+        calibrator.sample()
+    assert recognizer.energy_threshold == 300.0
+
+
+def test_sample_which_overlaps_the_speech_is_discarded(calibrator, recognizer):
+    calibrator.calibrate()
+    recognizer.noise = 900.0
+
+    def speak():
+        with calibrator.paused():
+            pass
+    recognizer.hook = speak
+    calibrator.sample()
+    assert recognizer.energy_threshold == 300.0
+    assert stored(calibrator) == {'default': 300.0}
+
+
+def test_sample_is_skipped_while_listening(calibrator, recognizer):
+    recognizer.noise = 900.0
+    with calibrator.listening():
+        calibrator.sample()
+    assert recognizer.energy_threshold == 300.0
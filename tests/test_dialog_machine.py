@@ -0,0 +1,143 @@
+import json
+
+import pytest
+
+import bar_config_de
+from bar_settings import Bar
+from conftest import extract
+from dialog_machine import DIALOG, DialogMachine, extract_plain_turn
+from fuzzy_menu import FuzzyMenu
+from menu import Menu
+from scenarios import scenarios
+
+
+def replay(machine, utterances, session='session'):
+    state = machine.start(session)
+    spoken = []
+    for text in utterances:
+        state, prompts = machine.step(state, extract(machine.bar.menu, text))
+        spoken.append(prompts)
+    return state, spoken
+
+
+@pytest.mark.parametrize('name', sorted(scenarios))
+def test_scenarios_end_with_goodbye(machine, name):
+    state, spoken = replay(machine, scenarios[name])
+    assert machine.is_done(state)
+    assert spoken[-1] == [machine.config.goodbye]
+
+
+def test_plain_order(machine, tickets):
+    state, spoken = replay(machine, ['a cola please'])
+    assert state.state == 'order'
+    assert state.served == ['cola'] and state.case == 0
+    assert spoken == [['Your cola is coming right now!', machine.config.another_order]]
+    assert [ticket.drinks for ticket in tickets.tickets] == [['cola']]
+
+
+def test_unspecified_tea_is_asked(machine):
+    state, spoken = replay(machine, ['i would like tea', 'cola', 'green tea'])
+    assert spoken[0] == [machine.bar.ask_specially]
+    assert spoken[1] == [machine.bar.repeat_question]
+    assert state.served == ['green tea']
+
+
+def test_alcohol_with_age(machine, tickets):
+    state, spoken = replay(machine, ['vodka and orange juice', 'i am 25'])
+    assert state.state == 'order'
+    assert spoken[0] == [machine.bar.age_question([(0, 'vodka')])]
+    assert state.served == ['vodka', 'orange juice'] and state.case == 1
+    assert tickets.tickets[0].case == 1
+
+
+def test_minor_gets_only_soft_drinks(machine):
+    state, spoken = replay(machine, ['vodka and orange juice', 'fifteen'])
+    assert state.served == ['orange juice'] and state.case == 3
+    state, spoken = replay(machine, ['vodka', 'twelve'])
+    assert state.served == [] and state.case == 2
+    assert spoken[-1][0] == machine.bar.only_alcohol
+
+
+def test_age_is_asked_again_and_kept(machine):
+    state, spoken = replay(machine, ['whiskey', None, 'i do not know', 'twenty one', 'brandy'])
+    assert spoken[1] == [machine.bar.repeat_age_short]
+    assert spoken[2] == [machine.bar.repeat_age]
+    assert state.verified_age == 21
+    # the age of the customer is verified once per dialog
+    assert state.served == ['brandy'] and state.case == 1
+
+
+def test_age_answer_is_not_parsed(machine):
+    state, _ = replay(machine, ['whiskey'])
+    assert not machine.needs_parse(state)
+    assert extract_plain_turn('I am Twenty one') == {'tokens': ['i', 'am', 'twenty', 'one'], 'candidates': [],
+                                                     'numbers': [21], 'rejected': False, 'tier': 0}
+    state, _ = machine.step(state, extract_plain_turn('I am Twenty one'))
+    assert machine.needs_parse(state) and state.verified_age == 21
+
+
+def test_german_age_answer():
+    config = bar_config_de
+    menu = Menu(config.cold_drinks, config.hot_drinks, config.tea, config.alcohol)
+    machine = DialogMachine(Bar(None, None, menu, FuzzyMenu(menu), config=config))
+    state, _ = machine.step(machine.start('session'), extract(menu, 'einen wodka bitte', config))
+    assert state.state == 'age'
+    state, _ = machine.step(state, extract_plain_turn('einundzwanzig', machine.number_words))
+    assert state.verified_age == 21 and state.served == ['wodka']
+
+
+def test_not_understood_and_unknown_drinks(machine, tickets):
+    state, spoken = replay(machine, [None, 'please', 'a pizza please'])
+    assert spoken[0] == [machine.config.repeat]
+    assert spoken[1] == [machine.config.repeat]
+    assert spoken[2] == [machine.bar.not_selling, machine.config.another_order]
+    assert state.state == 'order' and not tickets.tickets
+
+
+def test_uncertain_match_is_confirmed(machine):
+    state, spoken = replay(machine, ['kola'])
+    assert state.state == 'confirm'
+    assert spoken == [[machine.templates.confirmation('cola')]]
+    state, prompts = machine.step(state, extract(machine.bar.menu, 'yes please'))
+    assert state.served == ['cola']
+    state, spoken = replay(machine, ['kola', 'no'])
+    assert state.served == [] and spoken[1][0] == machine.bar.not_selling
+
+
+def test_snapshot_resume(machine, menu, tickets):
+    state, _ = replay(machine, ['vodka'], session='moved')
+    snapshot = machine.snapshot(state)
+    other = DialogMachine(machine.bar)
+    resumed = other.resume(json.loads(json.dumps(snapshot)))
+    assert resumed == state
+    resumed, prompts = other.step(resumed, extract(menu, 'i am 30'))
+    assert resumed.served == ['vodka']
+    assert tickets.tickets[-1].session == 'moved'
+
+
+def test_resume_rejects_unknown_state(machine):
+    with pytest.raises(ValueError):
+        machine.resume(json.dumps(['session', 'nowhere', [], None, None, None, None, 0]))
+
+
+def test_anticipated_answers_match_the_served_ones(machine):
+    state, _ = replay(machine, ['vodka and cola'])
+    anticipated = machine.anticipate(state)
+    _, adult = machine.step(state, extract(machine.bar.menu, '40'))
+    _, minor = machine.step(state, extract(machine.bar.menu, '16'))
+    assert adult[0] in anticipated and minor[0] in anticipated
+
+
+@pytest.mark.parametrize('change, message', [
+    (('order', 0, ('missing', 'ask_repeat', 'order')), 'unknown guard'),
+    (('order', 0, ('not_understood', 'missing', 'order')), 'unknown action'),
+    (('order', 0, ('not_understood', 'ask_repeat', 'missing')), 'unknown state'),
+    (('order', 4, ('rejected', 'take_order', 'resolve')), 'must have no guard'),
+])
+def test_compile_checks_the_description(machine, change, message):
+    state, index, transition = change
+    spec = {name: {'listen': node['listen'], 'transitions': list(node['transitions'])}
+            for (name, node) in DIALOG.items()}
+    spec[state]['transitions'][index] = transition
+    with pytest.raises(ValueError, match=message):
+        DialogMachine(machine.bar, spec)
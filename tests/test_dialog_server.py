@@ -0,0 +1,130 @@
+import asyncio
+import queue
+import threading
+
+import pytest
+
+import dialog_server
+from conftest import extract
+from dialog_server import DialogServer, DialogClient, NLPWorkerPool
+from menu import Menu
+from scenarios import scenarios
+
+
+class MenuPool(object):
+    """
+    Stand-in of NLPWorkerPool which extracts the turns without the language model
+    """
+    def __init__(self, menu):
+        self.menu = menu
+        self.texts = []
+
+    def start(self, menu):
+        assert menu is self.menu
+
+    async def extract(self, text):
+        self.texts.append(text)
+        return extract(self.menu, text)
+
+
+@pytest.fixture
+def server(menu, tickets):
+    return DialogServer(MenuPool(menu), menu, max_sessions=2, tickets=tickets)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pytest.mark.parametrize('name', sorted(scenarios))
+def test_scenarios(server, name):
+    async def replay():
+        session = (await server.dispatch({'op': 'start'}))['session']
+        responses = [await server.dispatch({'op': 'say', 'session': session, 'text': text})
+                     for text in scenarios[name]]
+        return session, responses
+
+    session, responses = run(replay())
+    assert [response['done'] for response in responses] == [False] * (len(responses) - 1) + [True]
+    assert session not in server.sessions
+
+
+def test_suspend_and_resume_on_another_server(server, menu, tickets):
+    other = DialogServer(MenuPool(menu), menu, tickets=tickets)
+
+    async def move():
+        session = (await server.dispatch({'op': 'start'}))['session']
+        asked = await server.dispatch({'op': 'say', 'session': session, 'text': 'whiskey'})
+        snapshot = (await server.dispatch({'op': 'suspend', 'session': session}))['snapshot']
+        gone = await server.dispatch({'op': 'say', 'session': session, 'text': '30'})
+        resumed = await other.dispatch({'op': 'resume', 'snapshot': snapshot})
+        served = await other.dispatch({'op': 'say', 'session': session, 'text': 'i am 30'})
+        return asked, gone, resumed, served
+
+    asked, gone, resumed, served = run(move())
+    assert 'alcoholic' in asked['prompts'][0]
+    # the age is not sent to the workers
+    assert server.pool.texts == ['whiskey'] and other.pool.texts == []
+    assert gone == {'error': 'unknown session'}
+    assert resumed['session'] in other.sessions
+    assert served['prompts'][0] == 'Your whiskey is coming right now!'
+    assert tickets.tickets[0].drinks == ['whiskey']
+
+
+def test_errors(server):
+    async def requests():
+        responses = [await server.dispatch({'op': 'start'}) for _ in range(3)]
+        responses.append(await server.dispatch({'op': 'end', 'session': responses[0]['session']}))
+        responses.append(await server.dispatch({'op': 'resume', 'snapshot': 'not json'}))
+        responses.append(await server.dispatch({'op': 'say', 'session': 'unknown', 'text': 'cola'}))
+        responses.append(await server.dispatch({'op': 'dance', 'session': responses[1]['session']}))
+        return responses
+
+    responses = run(requests())
+    assert responses[2:] == [{'error': 'too many sessions'}, {'done': True}, {'error': 'invalid snapshot'},
+                             {'error': 'unknown session'}, {'error': 'unknown operation'}]
+
+
+def test_client_over_tcp(server):
+    ports = queue.Queue()
+    stop = threading.Event()
+
+    async def serve():
+        listener = await asyncio.start_server(server.handle_connection, '127.0.0.1', 0)
+        ports.put(listener.sockets[0].getsockname()[1])
+        while not stop.is_set():
+            await asyncio.sleep(0.01)
+        listener.close()
+        await listener.wait_closed()
+
+    thread = threading.Thread(target=asyncio.run, args=(serve(),), daemon=True)
+    thread.start()
+    try:
+        client = DialogClient('127.0.0.1', ports.get(timeout=5))
+        try:
+            dialog = client.run_script(scenarios['unspecified_tea'])
+        finally:
+            client.close()
+    finally:
+        stop.set()
+        thread.join()
+    assert [text for (text, _) in dialog] == scenarios['unspecified_tea']
+    assert dialog[1][1][0] == 'Your green tea is coming right now!'
+
+
+def test_workers_get_the_menu_of_the_server(monkeypatch):
+    started = {}
+
+    class Executor(object):
+        def __init__(self, workers, initializer, initargs):
+            started.update(workers=workers, initializer=initializer, initargs=initargs)
+
+    monkeypatch.setattr(dialog_server, 'ProcessPoolExecutor', Executor)
+    menu = Menu(['cola'], ['tea', 'green tea'], ['green tea'], [], {'coke': 'cola'})
+
+    async def serve():
+        DialogServer(NLPWorkerPool(workers=3), menu)
+
+    run(serve())
+    assert started == {'workers': 3, 'initializer': dialog_server.init_worker,
+                       'initargs': (['cola'], ['tea', 'green tea'], ['green tea'], [], {'coke': 'cola'}, False)}
@@ -0,0 +1,39 @@
+from extraction_cache import ParseCache
+
+
+class Pipeline(object):
+    """
+    Stand-in of the spaCy pipeline which counts the parsed transcripts
+    """
+    def __init__(self):
+        self.parsed = []
+
+    def __call__(self, text):
+        self.parsed.append(text)
+        return {'text': text}
+
+
+def test_repeated_transcript_is_parsed_once():
+    cache, pipeline = ParseCache(), Pipeline()
+    first = cache.parse(pipeline, 'A  Cola please')
+    assert cache.parse(pipeline, 'a cola PLEASE') is first
+    assert pipeline.parsed == ['a cola please']
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_is_evicted():
+    cache, pipeline = ParseCache(max_entries=2), Pipeline()
+    cache.parse(pipeline, 'cola')
+    cache.parse(pipeline, 'tea')
+    cache.parse(pipeline, 'cola')
+    cache.parse(pipeline, 'rom')
+    assert list(cache.docs) == ['cola', 'rom']
+    cache.parse(pipeline, 'tea')
+    assert pipeline.parsed == ['cola', 'tea', 'rom', 'tea']
+
+
+def test_store_is_bounded():
+    cache = ParseCache(max_entries=1)
+    cache.store('cola', 'first')
+    cache.store('tea', 'second')
+    assert list(cache.docs.items()) == [('tea', 'second')]
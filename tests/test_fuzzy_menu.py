@@ -0,0 +1,46 @@
+import pytest
+
+from fuzzy_menu import FuzzyMenu, levenshtein, ngrams, phonetic_key
+
+
+def test_levenshtein():
+    assert levenshtein('rom', 'rum') == 1
+    assert levenshtein('cola', 'cola') == 0
+    assert levenshtein('', 'tea') == 3
+
+
+def test_phonetic_key():
+    assert phonetic_key('rum') == phonetic_key('rom')
+    assert phonetic_key('jager') == phonetic_key('jaeger')
+    assert phonetic_key('cola') == phonetic_key('kola')
+
+
+def test_ngrams_are_padded():
+    assert ngrams('tea') == {' te', 'tea', 'ea '}
+
+
+@pytest.fixture
+def fuzzy(menu):
+    return FuzzyMenu(menu)
+
+
+@pytest.mark.parametrize('word, name', [
+    ('cola', 'cola'), ('Green  Tea', 'green tea'), ('cappucino', 'cappuccino'), ('esspresso', 'espresso'),
+    ('lemonjuice', 'lemon juice'), ('cofee', 'coffee')])
+def test_accepted(fuzzy, word, name):
+    found, confidence = fuzzy.match(word)
+    assert found == name and confidence >= fuzzy.accept
+
+
+@pytest.mark.parametrize('word, name', [
+    # short words and alcoholic beverages are always confirmed
+    ('late', 'latte'), ('kola', 'cola'), ('room', 'rom'), ('rome', 'rom'), ('roam', 'rom'), ('wodka', 'vodka'),
+    ('whisky', 'whiskey')])
+def test_confirmed(fuzzy, word, name):
+    found, confidence = fuzzy.match(word)
+    assert found == name and fuzzy.confirm <= confidence < fuzzy.accept
+
+
+@pytest.mark.parametrize('word', ['pizza', 'no', 'burger', 'hamburger'])
+def test_rejected(fuzzy, word):
+    assert fuzzy.match(word) == (None, 0.0)
@@ -0,0 +1,95 @@
+import pytest
+
+import bar_config
+import bar_config_de
+import language_pool
+from bar_settings import Bar
+from language_pool import LanguagePool, language_config
+from menu import Menu
+
+
+MEGABYTE = 1024 * 1024
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    """
+    Resident memory of the process as seen by the pool, every loaded language takes the megabytes given by its
+    loader
+    """
+    memory = {'resident': 100 * MEGABYTE}
+    monkeypatch.setattr(language_pool, 'resident_memory', lambda: memory['resident'])
+    return memory
+
+
+@pytest.fixture
+def unloaded():
+    return []
+
+
+@pytest.fixture
+def pool_of(memory, unloaded):
+    sizes = {'en': 40, 'de': 30, 'fr': 20}
+
+    def loader(language):
+        memory['resident'] += sizes[language] * MEGABYTE
+        return 'resources of ' + language
+
+    def unloader(language, resources):
+        memory['resident'] -= sizes[language] * MEGABYTE
+        unloaded.append((language, resources))
+
+    return lambda **bounds: LanguagePool(loader, unloader, **bounds)
+
+
+def test_loaded_language_is_reused(pool_of):
+    pool = pool_of()
+    assert pool.get('en') == 'resources of en'
+    assert pool.get('en') == 'resources of en'
+    assert pool.report() == {'en': {'loads': 1, 'evictions': 0, 'uses': 2, 'memory': 40 * MEGABYTE,
+                                    'load_time': pool.report()['en']['load_time'], 'loaded': True}}
+
+
+def test_least_recently_used_language_is_evicted(pool_of, unloaded):
+    pool = pool_of(budget=80 * MEGABYTE)
+    pool.get('en')
+    pool.get('de')
+    pool.get('en')
+    pool.get('fr')
+    assert pool.loaded() == ['en', 'fr']
+    assert unloaded == [('de', 'resources of de')]
+    assert pool.footprint() == 60 * MEGABYTE
+    assert pool.report()['de']['evictions'] == 1 and not pool.report()['de']['loaded']
+
+
+def test_requested_language_is_never_evicted(pool_of):
+    pool = pool_of(budget=10 * MEGABYTE)
+    pool.get('en')
+    assert pool.get('de') == 'resources of de'
+    assert pool.loaded() == ['de']
+
+
+def test_max_languages(pool_of):
+    pool = pool_of(max_languages=2)
+    for language in ['en', 'de', 'fr']:
+        pool.get(language)
+    assert pool.loaded() == ['de', 'fr'] and 'en' not in pool
+
+
+def test_language_config():
+    assert language_config('en') is bar_config
+    assert language_config('de') is bar_config_de
+    with pytest.raises(ImportError):
+        language_config('xx')
+
+
+def test_german_templates():
+    config = bar_config_de
+    bar = Bar(None, None, Menu(config.cold_drinks, config.hot_drinks, config.tea, config.alcohol), config=config)
+    assert bar.generate_answers(['kaffee']) == 'Einmal kaffee, kommt sofort!'
+    assert bar.generate_answers(['kaffee', 'cola']) == 'Sie möchten kaffee und cola. Kommt sofort!'
+    assert bar.age_question([(0, 'rum'), (1, 'wodka')]) == \
+        'Sie haben rum und wodka bestellt, das sind alkoholische Getränke. Wie alt sind Sie?'
+    assert bar.introduction_sentence().startswith('Willkommen in der Bar. Wir servieren')
+    # the English class attributes are left untouched
+    assert Bar.one_drink_answer == 'Your {} is coming right now!'
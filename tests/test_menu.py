@@ -0,0 +1,40 @@
+import pytest
+
+from menu import Menu
+
+
+def test_categories(menu):
+    assert len(menu) == 21
+    assert menu.hot[:2] == ['black tea', 'green tea']
+    assert 'cola' in menu.cold
+    assert menu.tea == ['black tea', 'green tea', 'jasmine']
+    assert set(menu.alcohol) == {'vodka', 'whiskey', 'jaeger', 'rom', 'brandy'}
+
+
+def test_lookup_is_normalized(menu):
+    assert menu.lookup('  Green   TEA ') == 'green tea'
+    assert menu.lookup('beer') is None
+    assert 'Cola' in menu
+    assert menu.is_tea('jasmine') and not menu.is_tea('cola')
+    assert menu.is_alcoholic('rom') and not menu.is_alcoholic('beer')
+
+
+def test_aliases(menu):
+    menu.add_alias('Rum', 'rom')
+    assert menu.lookup('rum') == 'rom'
+    assert menu.is_alcoholic('rum')
+    assert menu.item('rum').category == 'cold'
+    with pytest.raises(KeyError):
+        menu.add_alias('beer', 'lager')
+
+
+def test_match_tokens_prefers_longest_phrase():
+    menu = Menu(['lemon', 'lemon juice'], ['tea', 'green tea'])
+    tokens = 'a green tea and a lemon juice please'.split()
+    assert menu.match_tokens(tokens) == [(1, 3, 'green tea'), (5, 7, 'lemon juice')]
+
+
+def test_match_tokens_with_alias(menu):
+    menu.add_alias('orange', 'orange juice')
+    assert menu.match_tokens(['Orange', 'and', 'rom']) == [(0, 1, 'orange juice'), (2, 3, 'rom')]
+    assert menu.match_tokens(['water']) == []
@@ -0,0 +1,42 @@
+from model_registry import ModelRegistry, resident_memory
+
+
+class Model(object):
+    """
+    Stand-in of the spaCy language object which records the disabled components of every call
+    """
+    pipe_names = ['tok2vec', 'tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'ner']
+    vocab = 'shared vocabulary'
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text, disable=()):
+        self.calls.append((text, list(disable)))
+        return text.split()
+
+
+def test_resident_memory():
+    assert resident_memory() > 0
+
+
+def test_views_share_the_model():
+    registry, model = ModelRegistry(), Model()
+    # a loaded model is not loaded again
+    registry.models['fake'] = model
+    tagger = registry.pipeline('fake', ['tagger'])
+    full = registry.pipeline('fake')
+    assert tagger.model is full.model is model
+    assert tagger.vocab == 'shared vocabulary'
+    assert tagger('a cola') == ['a', 'cola']
+    full('a tea')
+    assert model.calls == [('a cola', ['parser', 'lemmatizer', 'ner']), ('a tea', [])]
+
+
+def test_unload():
+    registry = ModelRegistry()
+    registry.models['fake'] = Model()
+    registry.statistics['fake'] = {'load_time': 0.1, 'memory': 1024, 'components': Model.pipe_names}
+    assert registry.report() == {'fake': registry.statistics['fake']}
+    registry.unload('fake')
+    assert registry.models == {} and registry.report() == {}
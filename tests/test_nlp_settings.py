@@ -0,0 +1,30 @@
+import pytest
+
+for module in ('nltk', 'spacy', 'en_core_web_sm'):
+    pytest.importorskip(module)
+
+import bar_config
+from nlp_settings import NLP
+
+
+@pytest.fixture(scope='module')
+def nlp():
+    return NLP(patterns=bar_config.patterns)
+
+
+def test_one_pass_returns_labelled_combinations(nlp):
+    order_doc = nlp.parse('I want a green tea and an orange juice')
+    combinations = nlp.match_combinations(order_doc)
+    assert ('Adjective_Noun', 'green tea') in combinations
+    assert nlp.extract_combinations(order_doc, 'Adjective_Noun') == \
+        [combination for (label, combination) in combinations if label == 'Adjective_Noun']
+
+
+def test_patterns_from_config_are_compiled_once():
+    nlp = NLP(patterns={'Shot_Of': [{'LOWER': 'shot'}, {'LOWER': 'of'}, {'POS': 'NOUN'}]})
+    order_doc = nlp.parse('a shot of vodka please')
+    assert ('Shot_Of', 'shot of vodka') in nlp.match_combinations(order_doc)
+    # replacing a pattern does not register the type twice
+    nlp.compile_pattern('Shot_Of', [{'LOWER': 'shot'}])
+    assert nlp.extract_combinations(order_doc, 'Shot_Of') == ['shot']
+    assert 'shot of vodka' not in nlp.collect_compounds(order_doc)
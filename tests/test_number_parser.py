@@ -0,0 +1,36 @@
+import pytest
+
+import bar_config_de
+from number_parser import NumberWords, extract_numbers
+
+
+@pytest.mark.parametrize('text, numbers', [
+    ('i am 25', [25]),
+    ('twenty one', [21]),
+    ('I am twenty-five years old', [25]),
+    ('a hundred and two', [102]),
+    ('eighteen or 19', [18, 19]),
+    ('i do not know', []),
+    ('', []),
+])
+def test_extract_numbers(text, numbers):
+    assert extract_numbers(text) == numbers
+
+
+@pytest.mark.parametrize('text, numbers', [
+    ('einundzwanzig', [21]),
+    ('Ich bin achtzehn Jahre alt', [18]),
+    ('zweiundvierzig', [42]),
+    ('ein und dreißig', [31]),
+    ('hundertundzwei', [102]),
+    ('siebzehn oder 19', [17, 19]),
+    # words which only begin with a number are not numbers
+    ('achtung', []),
+])
+def test_extract_german_numbers(text, numbers):
+    assert extract_numbers(text, NumberWords(**bar_config_de.number_words)) == numbers
+
+
+def test_number_words_written_together():
+    assert extract_numbers('twentyfive') == [25]
+    assert extract_numbers('tennis') == []
@@ -0,0 +1,77 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from order_tickets import TicketSink, new_ticket
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'orders.sqlite3')
+
+
+def stored(path) -> list:
+    with sqlite3.connect(path) as connection:
+        return [(json.loads(drinks), case) for (drinks, case) in
+                connection.execute('SELECT drinks, age_case FROM tickets ORDER BY confirmed')]
+
+
+def test_tickets_are_committed(path):
+    sink = TicketSink(path, flush_interval=0.01)
+    sink.start()
+    for drinks in (['cola'], ['vodka', 'cola']):
+        assert sink.submit(new_ticket(drinks, 0, 'session'))
+    sink.flush()
+    sink.close()
+    assert stored(path) == [(['cola'], 0), (['vodka', 'cola'], 0)]
+    assert os.path.getsize(path + '.journal') == 0
+
+
+def test_journal_of_a_crashed_process_is_recovered(path):
+    tickets = [new_ticket(['cola'], 0, 'session'), new_ticket(['rom'], 1, 'session')]
+    with open(path + '.journal', 'w') as journal:
+        for ticket in tickets:
+            journal.write(json.dumps(ticket._asdict()) + '\n')
+        # the process crashed while it wrote the last line
+        journal.write('{"ticket_id": "cut')
+    with open(path + '.journal.replay', 'w') as journal:
+        journal.write(json.dumps(new_ticket(['fanta'], 0, 'session')._asdict()) + '\n')
+    sink = TicketSink(path)
+    sink.start()
+    sink.close()
+    assert sink.report()['recovered'] == 3
+    assert sorted(drinks for (drinks, _) in stored(path)) == [['cola'], ['fanta'], ['rom']]
+    assert not os.path.exists(path + '.journal.replay')
+
+    # tickets which were committed before the crash are not committed twice
+    with open(path + '.journal', 'w') as journal:
+        journal.write(json.dumps(tickets[0]._asdict()) + '\n')
+    sink = TicketSink(path)
+    sink.start()
+    sink.close()
+    assert sink.report()['recovered'] == 0
+    assert len(stored(path)) == 3
+
+
+def test_overflow_is_committed_from_the_journal(path):
+    sink = TicketSink(path, batch_size=2, flush_interval=0.01, max_pending=1)
+    sink.start()
+    queued = [sink.submit(new_ticket(['cola'], 0, str(number))) for number in range(50)]
+    sink.close()
+    assert not all(queued)
+    assert sink.report()['overflows'] == queued.count(False)
+    assert len(stored(path)) == 50
+
+
+def test_throughput(path):
+    sink = TicketSink(path, flush_interval=0.01)
+    sink.start()
+    for moment, drinks in ((10.0, ['cola']), (20.0, ['cola', 'fanta']), (3700.0, ['cola'])):
+        ticket = new_ticket(drinks, 0, 'session', ordered=moment)._replace(confirmed=moment)
+        sink.submit(ticket)
+    sink.flush()
+    assert sink.throughput(until=7200) == [(0, 'cola', 2), (0, 'fanta', 1), (3600, 'cola', 1)]
+    assert sink.throughput(since=3600, until=7200, drink='cola') == [(3600, 'cola', 1)]
+    sink.close()
@@ -0,0 +1,42 @@
+import json
+import socket
+import socketserver
+import threading
+
+import pytest
+
+from station import StationClient
+
+
+class EchoHandler(socketserver.StreamRequestHandler):
+    """
+    Stand-in of the station daemon, every request is answered with itself
+    """
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+        self.wfile.write((json.dumps({'ok': True, 'request': request}) + '\n').encode('utf-8'))
+
+
+@pytest.fixture
+def daemon():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), EchoHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_request(daemon):
+    client = StationClient(port=daemon.server_address[1])
+    assert client.is_running()
+    response = client.request({'op': 'session', 'language': 'de'}, timeout=5.0)
+    assert response == {'ok': True, 'request': {'op': 'session', 'language': 'de'}}
+
+
+def test_daemon_is_not_running():
+    with socket.socket() as unused:
+        unused.bind(('127.0.0.1', 0))
+        port = unused.getsockname()[1]
+    assert not StationClient(port=port).is_running()
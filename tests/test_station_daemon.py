@@ -0,0 +1,46 @@
+import os
+import threading
+
+import pytest
+
+for module in ('speech_recognition', 'gtts', 'playsound', 'nltk', 'spacy'):
+    pytest.importorskip(module)
+
+import bar_config
+from conftest import StubNLP
+from station_daemon import Station, StationLanguage
+
+
+class BlockingSettings(object):
+    """
+    Stand-in of Settings whose synthesis waits until the test releases it
+    """
+    def __init__(self):
+        self.release = threading.Event()
+        self.prewarmed = []
+
+    def prewarm(self, sentences, language=None):
+        self.release.wait(5.0)
+        self.prewarmed.append(language)
+
+
+def test_configure_does_not_wait_for_the_prewarm():
+    station = Station()
+    station.settings = BlockingSettings()
+    resources = StationLanguage(bar_config, StubNLP())
+    station.configure(resources)
+    assert resources.machine is not None and station.settings.prewarmed == []
+    station.settings.release.set()
+    station.prewarmer.shutdown(wait=True)
+    assert station.settings.prewarmed == ['en']
+
+
+def test_data_dir(tmp_path):
+    import default_settings
+    from benchmark import FakeMicrophone, FakeRecognizer
+    data_dir = str(tmp_path / 'station')
+    settings = default_settings.Settings(FakeMicrophone(), FakeRecognizer(), 'en', data_dir=data_dir)
+    assert os.path.isdir(data_dir)
+    assert settings.calibrator.store_path == os.path.join(data_dir, 'calibration.json')
+    settings = default_settings.Settings(FakeMicrophone(), FakeRecognizer(), 'en')
+    assert settings.path_for_music == os.path.dirname(os.path.abspath(default_settings.__file__))
@@ -0,0 +1,52 @@
+import wave
+
+import pytest
+
+from streaming_recognition import EnergyVAD, FileBackend, StreamingCapture, SyntheticSource, WaveFileSource
+
+
+def test_streaming_capture_detects_the_end_of_speech():
+    capture = StreamingCapture(FileBackend(['a cola please']), EnergyVAD(threshold=300), end_silence=0.2)
+    source = SyntheticSource([(0.2, 0), (0.5, 3000), (1.0, 0)], realtime=False)
+    with source:
+        assert capture.capture(source) == 'a cola please'
+    assert capture.latencies['chunks']
+
+
+def test_streaming_capture_times_out_in_silence():
+    capture = StreamingCapture(FileBackend(['never heard']), EnergyVAD(threshold=300), timeout=0.5)
+    source = SyntheticSource([(2.0, 0)], realtime=False)
+    with source:
+        assert capture.capture(source) is None
+
+
+def test_wave_file_source(tmp_path):
+    path = str(tmp_path / 'order.wav')
+    synthetic = SyntheticSource([(0.2, 0), (0.5, 3000), (1.0, 0)], realtime=False)
+    with synthetic, wave.open(path, 'wb') as wave_file:
+        wave_file.setnchannels(1)
+        wave_file.setsampwidth(synthetic.SAMPLE_WIDTH)
+        wave_file.setframerate(synthetic.SAMPLE_RATE)
+        wave_file.writeframes(synthetic.read(2 * synthetic.SAMPLE_RATE))
+    capture = StreamingCapture(FileBackend(['a cola please']), EnergyVAD(threshold=300), end_silence=0.2)
+    with WaveFileSource(path) as source:
+        assert (source.SAMPLE_RATE, source.SAMPLE_WIDTH) == (16000, 2)
+        assert capture.capture(source) == 'a cola please'
+
+
+def test_capture_latencies_are_traced(monkeypatch):
+    for module in ('gtts', 'playsound', 'speech_recognition'):
+        pytest.importorskip(module)
+    from audio_stream import MemoryPlayer
+    from benchmark import FakeRecognizer
+    from default_settings import Settings
+    from tracing import tracer
+    monkeypatch.setattr(tracer, 'enabled', True)
+    capture = StreamingCapture(FileBackend(['a cola please']), EnergyVAD(threshold=300), end_silence=0.2)
+    microphone = SyntheticSource([(0.2, 0), (0.5, 3000), (1.0, 0)], realtime=False)
+    settings = Settings(microphone, FakeRecognizer(), 'en', capture=capture, player=MemoryPlayer())
+    settings.calibrator.calibrated = True
+    fed, finished = tracer.histograms['capture_feed'].count, tracer.histograms['capture_finish'].count
+    assert settings.get_the_message() == 'a cola please'
+    assert tracer.histograms['capture_feed'].count == fed + len(capture.latencies['chunks'])
+    assert tracer.histograms['capture_finish'].count == finished + 1
@@ -0,0 +1,49 @@
+import pytest
+
+import bar_config
+from conftest import StubNLP
+from fuzzy_menu import FuzzyMenu
+from tiered_extractor import TieredExtractor
+
+
+@pytest.fixture
+def nlp():
+    return StubNLP()
+
+
+@pytest.fixture
+def extractor(nlp, menu):
+    return TieredExtractor(nlp, menu, bar_config.rejection, bar_config.fillers, FuzzyMenu(menu))
+
+
+def test_short_order_is_answered_by_tier_one(extractor, nlp):
+    order_doc = extractor.parse('I would like a Green Tea and a cola please')
+    assert order_doc.user_data['tier'] == 1
+    assert order_doc.user_data['drinks'] == ['green tea', 'cola']
+    assert order_doc.user_data['rejected:' + '|'.join(bar_config.rejection)] is False
+    assert nlp.parsed == []
+
+
+def test_rejection_is_answered_by_tier_one(extractor):
+    order_doc = extractor.fast_path('no thanks')
+    assert order_doc.user_data['drinks'] == []
+    assert order_doc.user_data['rejected:' + '|'.join(bar_config.rejection)] is True
+
+
+def test_accepted_fuzzy_match(extractor):
+    assert extractor.fast_path('a cappucino please').user_data['drinks'] == ['cappuccino']
+
+
+@pytest.mark.parametrize('text', [
+    # nothing of the menu, an unknown word besides the drink, a fuzzy match which has to be confirmed
+    'something warm', 'a cola with ice', 'a wodka'])
+def test_ambiguous_order_goes_to_the_parser(extractor, nlp, text):
+    assert extractor.fast_path(text) is None
+    order_doc = extractor.parse(text)
+    assert order_doc.user_data['tier'] == 2
+    assert nlp.parsed == [text]
+
+
+def test_without_fuzzy_menu(nlp, menu):
+    extractor = TieredExtractor(nlp, menu, bar_config.rejection, bar_config.fillers)
+    assert extractor.fast_path('a cappucino') is None
@@ -0,0 +1,101 @@
+import json
+import urllib.request
+
+import pytest
+
+from tracing import Histogram, Tracer
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for value in [0.0005] * 5 + [0.02] * 4 + [60.0]:
+        histogram.observe(value)
+    assert histogram.count == 10
+    assert histogram.percentile(0.5) == 0.001
+    assert histogram.percentile(0.9) == 0.025
+    assert histogram.percentile(0.99) == float('inf')
+    assert Histogram().percentile(0.5) == 0.0
+
+
+def test_disabled_tracer_collects_nothing():
+    tracer = Tracer()
+
+    @tracer.timed('stage')
+    def work():
+        return 42
+
+    assert work() == 42
+    with tracer.span('stage'):
+        tracer.count('orders')
+    assert tracer.snapshot() == {'stages': {}, 'counters': {}, 'events': []}
+
+
+def test_spans_and_counters():
+    tracer = Tracer(enabled=True)
+
+    @tracer.timed('parse')
+    def parse():
+        raise ValueError
+
+    trace_id = tracer.start_session()
+    with pytest.raises(ValueError):
+        parse()
+    with tracer.span('asr'):
+        pass
+    tracer.count('tier_one', 2)
+    snapshot = tracer.snapshot()
+    assert snapshot['stages']['parse']['count'] == 1
+    assert snapshot['counters'] == {'tier_one': 2}
+    assert [(each['trace_id'], each['stage']) for each in snapshot['events']] == [(trace_id, 'parse'),
+                                                                                  (trace_id, 'asr')]
+
+
+def test_prometheus_buckets_are_cumulative():
+    tracer = Tracer(enabled=True)
+    tracer.observe('tts', 0.003)
+    tracer.observe('tts', 0.2)
+    tracer.count('orders')
+    lines = tracer.prometheus().splitlines()
+    assert 'bar_stage_seconds_bucket{stage="tts",le="0.005"} 1' in lines
+    assert 'bar_stage_seconds_bucket{stage="tts",le="0.25"} 2' in lines
+    assert 'bar_stage_seconds_bucket{stage="tts",le="+Inf"} 2' in lines
+    assert 'bar_stage_seconds_count{stage="tts"} 2' in lines
+    assert 'bar_orders_total 1' in lines
+
+
+def test_export(tmp_path):
+    tracer = Tracer(enabled=True)
+    tracer.observe('asr', 0.5)
+    tracer.export(str(tmp_path / 'trace.json'))
+    tracer.export(str(tmp_path / 'trace.prom'))
+    with open(str(tmp_path / 'trace.json')) as trace:
+        assert json.load(trace)['stages']['asr']['count'] == 1
+    assert (tmp_path / 'trace.prom').read_text() == tracer.prometheus()
+
+
+def test_serve():
+    tracer = Tracer()
+    tracer.serve(port=0)
+    try:
+        assert tracer.enabled
+        tracer.count('orders')
+        port = tracer.server.server_address[1]
+        with urllib.request.urlopen('http://127.0.0.1:{0}/metrics'.format(port), timeout=5) as response:
+            assert response.read().decode('utf-8') == 'bar_orders_total 1\n'
+    finally:
+        tracer.server.shutdown()
+        tracer.server.server_close()
+
+
+def test_measurements_of_a_worker_are_merged():
+    worker, parent = Tracer(enabled=True), Tracer(enabled=True)
+    with worker.span('parse'):
+        worker.count('tier_two')
+    measurements = worker.take()
+    assert worker.take() == {'spans': [], 'counters': {}}
+    trace_id = parent.start_session()
+    parent.merge(measurements)
+    snapshot = parent.snapshot()
+    assert snapshot['stages']['parse']['count'] == 1
+    assert snapshot['counters'] == {'tier_two': 1}
+    assert snapshot['events'][0]['trace_id'] == trace_id
@@ -0,0 +1,63 @@
+from tracing import tracer
+
+
+class TieredExtractor(object):
+    def __init__(self, nlp, menu, rejection, fillers, fuzzy=None):
+        """
+        Two tiered extraction of the order. Tier one only tokenizes the sentence and matches the menu phrases and
+        the rejections. The tagger and the parser (tier two) run only if tier one is ambiguous or finds nothing.
+        :param nlp: NLP object
+        :param menu: Menu object
+        :param rejection: list of possible 'kind' rejections of ordering something
+        :param fillers: words which can appear in a short order besides the drinks
+        :param fuzzy: FuzzyMenu object, words close enough to a drink (e.g., 'rum') are matched without the parser
+        """
+        self.nlp = nlp
+        self.menu = menu
+        self.rejection = rejection
+        self.fillers = set(fillers)
+        self.fuzzy = fuzzy
+
+    def fast_path(self, text: str) -> object:
+        """
+        Tier one. Resulting Doc has only tokens, its extraction (drinks and rejection flag) is filled in, so the
+        decision methods of the Bar do not need the tagger.
+        :param text: transcript of the customer
+        :return: tokenized transcript, None if tier one cannot answer
+        """
+        with tracer.span('tier_one'):
+            order_doc = self.nlp.tokenizer.tokenizer(' '.join(text.lower().split()))
+            words = [token.text for token in order_doc]
+            rejected = any(each in self.rejection for each in words)
+            matches = self.menu.match_tokens(words)
+            covered = set()
+            for start, end, _ in matches:
+                covered.update(range(start, end))
+            leftover = [index for (index, each) in enumerate(words) if index not in covered and each not in self.fillers]
+            if self.fuzzy is not None and leftover and not rejected:
+                for index in list(leftover):
+                    name, confidence = self.fuzzy.match(words[index])
+                    if name is not None and confidence >= self.fuzzy.accept:
+                        matches.append((index, index + 1, name))
+                        leftover.remove(index)
+                matches.sort()
+            if not rejected and (not matches or leftover):
+                return None
+        order_doc.user_data['tier'] = 1
+        order_doc.user_data['drinks'] = [] if rejected else [name for (_, _, name) in matches]
+        order_doc.user_data['rejected:' + '|'.join(self.rejection)] = rejected
+        return order_doc
+
+    def parse(self, text: str) -> object:
+        """
+        :param text: transcript of the customer
+        :return: Doc of tier one if it can answer, fully parsed Doc otherwise
+        """
+        order_doc = self.fast_path(text)
+        if order_doc is not None:
+            tracer.count('tier_one')
+            return order_doc
+        tracer.count('tier_two')
+        order_doc = self.nlp.parse(text)
+        order_doc.user_data['tier'] = 2
+        return order_doc
@@ -0,0 +1,221 @@
+import bisect
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque, defaultdict
+
+
+class Histogram(object):
+    # upper bounds of the buckets in seconds
+    bounds = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def percentile(self, fraction: float) -> float:
+        """
+        :return: upper bound of the bucket which contains the percentile
+        """
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else float('inf')
+        return 0.0
+
+    def summary(self) -> dict:
+        return {'count': self.count, 'sum': self.total,
+                'p50': self.percentile(0.5), 'p90': self.percentile(0.9), 'p99': self.percentile(0.99),
+                'buckets': dict(zip([str(each) for each in self.bounds] + ['+Inf'], self.counts))}
+
+
+class NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class Span(object):
+    def __init__(self, tracer, stage: str):
+        self.tracer = tracer
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.tracer.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+null_span = NullSpan()
+
+
+class Tracer(object):
+    def __init__(self, enabled=False, max_events=10000):
+        """
+        Latency histograms per stage, counters and recent spans with the trace id of the session. When the tracer
+        is disabled spans and counters return immediately.
+        :param enabled: flag whether the measurements are collected
+        :param max_events: number of recent spans which are kept for the export
+        """
+        self.enabled = enabled
+        self.histograms = defaultdict(Histogram)
+        self.counters = defaultdict(int)
+        self.events = deque(maxlen=max_events)
+        self.lock = threading.Lock()
+        self.trace_id = contextvars.ContextVar('trace_id', default=None)
+        self.server = None
+
+    def start_session(self, trace_id=None) -> str:
+        """
+        Sets the trace id of the current session (context of the thread or the asyncio task)
+        :param trace_id: identifier of the session, a new one is generated if not given
+        :return: trace id
+        """
+        trace_id = trace_id or uuid.uuid4().hex[:16]
+        self.trace_id.set(trace_id)
+        return trace_id
+
+    def span(self, stage: str) -> object:
+        if not self.enabled:
+            return null_span
+        return Span(self, stage)
+
+    def observe(self, stage: str, duration: float):
+        with self.lock:
+            self.histograms[stage].observe(duration)
+            self.events.append((self.trace_id.get(), stage, time.time(), duration))
+
+    def count(self, name: str, amount: int = 1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] += amount
+
+    def timed(self, stage: str):
+        """
+        Decorator which measures every call of the function as the given stage
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.observe(stage, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def take(self) -> dict:
+        """
+        Removes the spans and counters collected since the last call, e.g., in a worker process which sends them to
+        the parent with its results
+        :return: measurements. Keys: spans (list of tuples (stage, duration)), counters
+        """
+        with self.lock:
+            spans = [(stage, duration) for (_, stage, _, duration) in self.events]
+            counters = dict(self.counters)
+            self.events.clear()
+            self.counters.clear()
+        return {'spans': spans, 'counters': counters}
+
+    def merge(self, measurements: dict):
+        """
+        Adds the measurements taken in another process (see take) to this tracer, spans get the trace id of the
+        current session
+        :param measurements: measurements made by take
+        :return:
+        """
+        for stage, duration in measurements['spans']:
+            self.observe(stage, duration)
+        for name, amount in measurements['counters'].items():
+            self.count(name, amount)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {'stages': {stage: histogram.summary() for (stage, histogram) in self.histograms.items()},
+                    'counters': dict(self.counters),
+                    'events': [{'trace_id': trace_id, 'stage': stage, 'time': moment, 'duration': duration}
+                               for (trace_id, stage, moment, duration) in self.events]}
+
+    def prometheus(self) -> str:
+        """
+        :return: histograms and counters in the Prometheus text format
+        """
+        lines = []
+        with self.lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(list(histogram.bounds) + ['+Inf'], histogram.counts):
+                    cumulative += count
+                    lines.append('bar_stage_seconds_bucket{stage="%s",le="%s"} %d' % (stage, bound, cumulative))
+                lines.append('bar_stage_seconds_sum{stage="%s"} %f' % (stage, histogram.total))
+                lines.append('bar_stage_seconds_count{stage="%s"} %d' % (stage, histogram.count))
+            for name, value in sorted(self.counters.items()):
+                lines.append('bar_%s_total %d' % (name, value))
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path: str):
+        """
+        Writes the measurements to the file, Prometheus text format if the file ends with .prom, JSON otherwise
+        :param path: path of the file
+        :return:
+        """
+        temporary = path + '.tmp'
+        with open(temporary, 'w') as output:
+            if path.endswith('.prom'):
+                output.write(self.prometheus())
+            else:
+                json.dump(self.snapshot(), output)
+        os.replace(temporary, path)
+
+    def serve(self, port: int = 9108, host: str = '127.0.0.1'):
+        """
+        Enables the tracer and starts the scrape endpoint (GET /metrics, GET /trace) in a background thread
+        """
+        self.enabled = True
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body, content_type = tracer.prometheus().encode('utf-8'), 'text/plain; version=0.0.4'
+                elif self.path == '/trace':
+                    body, content_type = json.dumps(tracer.snapshot()).encode('utf-8'), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self.server.serve_forever, name='metrics', daemon=True).start()
+
+
+tracer = Tracer(enabled=os.environ.get('BAR_TRACE') == '1')